@@ -0,0 +1,235 @@
+"""Micro-benchmarks.
+
+Run with ``python -m pytest benchmarks --no-cov`` from the ``python`` directory.
+
+Options:
+    ``--benchmark-json PATH``: Write the results to ``PATH`` as JSON.
+    ``--benchmark-compare [PATH]``: Fail benchmarks whose median time is
+        slower than the median in ``PATH``, ``benchmarks/baseline.json`` by
+        default. Off unless given, so timings never fail a normal test run.
+    ``--benchmark-threshold RATIO``: The allowed slowdown relative to the
+        baseline, 1.0 by default. Medians of unchanged code vary by up to
+        about 1.8x between runs on a shared machine.
+    ``--benchmark-rounds N``: The number of timed rounds, 11 by default.
+    ``--benchmark-min-time SECONDS``: The minimum duration of each round.
+
+The checked in baseline is updated with
+``python -m pytest benchmarks --no-cov --benchmark-json benchmarks/baseline.json``.
+Timings depend on the machine, so compare results from the same machine.
+"""
+import asyncio
+import gc
+import inspect
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pytest
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+_results_key = pytest.StashKey[dict[str, dict[str, Any]]]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark-json",
+        metavar="PATH",
+        help="write the benchmark results to PATH as JSON",
+    )
+    group.addoption(
+        "--benchmark-compare",
+        metavar="PATH",
+        nargs="?",
+        const=str(BASELINE),
+        help="fail benchmarks slower than the results in PATH",
+    )
+    group.addoption(
+        "--benchmark-threshold",
+        metavar="RATIO",
+        type=float,
+        default=1.0,
+        help="the allowed slowdown relative to the baseline",
+    )
+    group.addoption(
+        "--benchmark-rounds",
+        metavar="N",
+        type=int,
+        default=11,
+        help="the number of timed rounds",
+    )
+    group.addoption(
+        "--benchmark-min-time",
+        metavar="SECONDS",
+        type=float,
+        default=0.02,
+        help="the minimum duration of each round",
+    )
+
+
+def pytest_configure(config):
+    config.stash[_results_key] = {}
+
+
+class Benchmark:
+    """Measure the time per call of a function or coroutine function."""
+
+    def __init__(
+        self,
+        name: str,
+        rounds: int,
+        min_time: float,
+        baseline: Optional[dict[str, Any]],
+        threshold: float,
+    ):
+        self.name = name
+        self.rounds = rounds
+        self.min_time = min_time
+        self.baseline = baseline
+        self.threshold = threshold
+        self.result: Optional[dict[str, Any]] = None
+
+    def __call__(self, func: Callable[..., Any], *args: Any, **kwargs: Any):
+        if inspect.iscoroutinefunction(func):
+
+            def timer(loops: int) -> float:
+                return asyncio.run(_time_async(func, args, kwargs, loops))
+
+        else:
+
+            def timer(loops: int) -> float:
+                return _time(func, args, kwargs, loops)
+
+        # like timeit, keep garbage collection from adding noise to the timings
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            loops = _calibrate(timer, self.min_time)
+            times = [timer(loops) / loops for _ in range(self.rounds)]
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self.result = {
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+            "loops": loops,
+            "rounds": self.rounds,
+        }
+        self._check()
+
+    def _check(self):
+        if self.baseline is None or self.result is None:
+            return
+        if sys.gettrace() is not None:
+            pytest.fail("Tracing is active, compare benchmarks with --no-cov")
+
+        # the median of several rounds is less sensitive to outliers than
+        # the minimum
+        limit = self.baseline["median"] * (1 + self.threshold)
+        if self.result["median"] > limit:
+            pytest.fail(
+                f"{self.name} regressed: {_format_time(self.result['median'])} "
+                f"per call, baseline {_format_time(self.baseline['median'])}"
+            )
+
+
+def _time(func: Callable[..., Any], args: tuple, kwargs: dict, loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+async def _time_async(
+    func: Callable[..., Any], args: tuple, kwargs: dict, loops: int
+) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        await func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _calibrate(timer: Callable[[int], float], min_time: float) -> int:
+    loops = 1
+    elapsed = timer(loops)
+    while elapsed < min_time:
+        # aim slightly past the minimum time to avoid another iteration
+        factor = 10 if elapsed <= 0 else min_time * 1.2 / elapsed
+        loops = max(loops + 1, math.ceil(loops * min(factor, 10)))
+        elapsed = timer(loops)
+    return loops
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+@pytest.fixture(scope="session")
+def _baseline(pytestconfig) -> dict[str, Any]:
+    return _load_baseline(pytestconfig)
+
+
+def _load_baseline(config: pytest.Config) -> dict[str, Any]:
+    path = config.getoption("benchmark_compare")
+    if path is None:
+        return {}
+    with open(path) as f:
+        return json.load(f)["benchmarks"]
+
+
+@pytest.fixture
+def benchmark(request, pytestconfig, _baseline):
+    """Get a :class:`Benchmark` for the current test."""
+    name = request.node.nodeid
+    bench = Benchmark(
+        name,
+        pytestconfig.getoption("benchmark_rounds"),
+        pytestconfig.getoption("benchmark_min_time"),
+        _baseline.get(name),
+        pytestconfig.getoption("benchmark_threshold"),
+    )
+    yield bench
+    if bench.result is not None:
+        pytestconfig.stash[_results_key][name] = bench.result
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("benchmark_json")
+    results = session.config.stash[_results_key]
+    if path is None or not results:
+        return
+
+    data = {
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "benchmarks": dict(sorted(results.items())),
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash[_results_key]
+    if not results:
+        return
+
+    baseline = _load_baseline(config)
+    terminalreporter.section("benchmarks")
+    width = max(len(name) for name in results)
+    for name, result in sorted(results.items()):
+        line = f"{name:<{width}}  {_format_time(result['median']):>10}"
+        if name in baseline:
+            change = result["median"] / baseline[name]["median"] - 1
+            line += f"  {change:+7.1%}"
+        terminalreporter.write_line(line)
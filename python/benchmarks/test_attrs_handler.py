@@ -0,0 +1,103 @@
+from typing import Optional, Union
+
+import attrs
+import orjson
+import pytest
+from attrs import frozen
+from blacksheep import Content, Request
+from blacksheep.server.openapi.v3 import OpenAPIHandler
+from oes.util.blacksheep.attrs_handler import AttrsBinder, SchemaCache, _get_field_type
+from openapidocs.v3 import Info
+
+
+@frozen
+class Address:
+    street: str
+    city: str
+    postal_code: Optional[str] = None
+
+
+@frozen
+class Person:
+    id: int
+    name: str
+    email: Optional[str]
+    tags: list[str]
+    addresses: list[Address]
+
+
+def _make_person(i):
+    return {
+        "id": i,
+        "name": f"Person {i}",
+        "email": f"person{i}@example.com",
+        "tags": ["a", "b", "c"],
+        "addresses": [{"street": "Main St", "city": "Springfield"}],
+    }
+
+
+_bodies = {
+    "small": orjson.dumps(_make_person(1)),
+    "large": orjson.dumps(
+        {**_make_person(1), "addresses": [{"street": "x" * 100, "city": "y"}] * 2000}
+    ),
+}
+
+
+@pytest.mark.parametrize("size", ["small", "large"])
+def test_attrs_binder_read_data(benchmark, size):
+    binder = AttrsBinder(Person)
+    body = _bodies[size]
+
+    async def read_data():
+        request = Request("POST", b"/", [(b"content-type", b"application/json")])
+        request.content = Content(b"application/json", body)
+        return await binder.read_data(request)
+
+    benchmark(read_data)
+
+
+@pytest.mark.parametrize("size", ["small", "large"])
+def test_attrs_binder_parse_value(benchmark, size):
+    binder = AttrsBinder(Person)
+    benchmark(binder.parse_value, orjson.loads(_bodies[size]))
+
+
+def _make_model_graph(n):
+    # each class refers to the previous two, through lists, unions and options
+    classes = [Address, Person]
+    for i in range(n):
+        a, b = classes[-2], classes[-1]
+        classes.append(
+            attrs.make_class(
+                f"Model{i}",
+                {
+                    "id": attrs.field(type=int),
+                    "name": attrs.field(type=Optional[str]),
+                    "items": attrs.field(type=list[a]),
+                    "values": attrs.field(type=dict[str, int]),
+                    "either": attrs.field(type=Union[a, b]),
+                    "other": attrs.field(type=Optional[b]),
+                },
+            )
+        )
+    return classes[-1]
+
+
+@pytest.mark.parametrize("use_refs", [False, True], ids=["inline", "refs"])
+def test_get_field_type(benchmark, use_refs):
+    model = _make_model_graph(200)
+
+    def get_field_type():
+        docs = OpenAPIHandler(info=Info(title="Benchmark", version="0.1.0"))
+        return _get_field_type(docs, model, cache=SchemaCache(use_refs=use_refs))
+
+    benchmark(get_field_type)
+
+
+def test_get_field_type_cached(benchmark):
+    model = _make_model_graph(200)
+    docs = OpenAPIHandler(info=Info(title="Benchmark", version="0.1.0"))
+    cache = SchemaCache()
+    _get_field_type(docs, model, cache=cache)
+    benchmark(_get_field_type, docs, model, cache=cache)
@@ -0,0 +1,34 @@
+import pytest
+from attrs import frozen
+from cattrs import BaseValidationError
+from cattrs.preconf.orjson import make_converter
+from oes.util import get_exception_details
+
+converter = make_converter()
+
+
+@frozen
+class Item:
+    id: int
+    name: str
+
+
+@frozen
+class Order:
+    items: list[Item]
+
+
+def _get_error(n):
+    data = {"items": [{"id": "x"} for _ in range(n)]}
+    with pytest.raises(BaseValidationError) as err:
+        converter.structure(data, Order)
+    return err.value
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"max_errors": 10}, {"deduplicate": True}],
+    ids=["all", "max_errors", "deduplicate"],
+)
+def test_get_exception_details(benchmark, options):
+    benchmark(get_exception_details, _get_error(1000), **options)
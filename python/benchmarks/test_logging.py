@@ -0,0 +1,30 @@
+import logging
+import sys
+
+import pytest
+from loguru import logger
+from oes.util.logging import InterceptHandler
+
+
+@pytest.fixture
+def std_logger():
+    # replace the default stderr handler with one that discards messages
+    logger.remove()
+    handler_id = logger.add(lambda m: None, level="INFO", format="{message}")
+    handler = InterceptHandler()
+    std_logger = logging.getLogger("benchmark")
+    std_logger.setLevel(logging.DEBUG)
+    std_logger.propagate = False
+    std_logger.addHandler(handler)
+    yield std_logger
+    std_logger.removeHandler(handler)
+    logger.remove(handler_id)
+    logger.add(sys.stderr)
+
+
+def test_intercept_handler_emit(benchmark, std_logger):
+    benchmark(std_logger.info, "message %s", 1)
+
+
+def test_intercept_handler_emit_dropped(benchmark, std_logger):
+    benchmark(std_logger.debug, "message %s", 1)
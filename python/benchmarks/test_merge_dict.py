@@ -0,0 +1,27 @@
+import pytest
+from oes.util import merge_dict
+
+
+def _make_wide(n, offset=0):
+    return {f"key{i}": {"value": i + offset, "items": [i, i + 1]} for i in range(n)}
+
+
+def _make_deep(depth, value):
+    doc = {"value": value}
+    for i in range(depth):
+        doc = {f"level{i}": doc, "value": value}
+    return doc
+
+
+@pytest.mark.parametrize("copy", [True, False])
+def test_merge_dict_wide(benchmark, copy):
+    a = _make_wide(1000)
+    b = _make_wide(1000, offset=1)
+    benchmark(merge_dict, a, b, copy=copy)
+
+
+@pytest.mark.parametrize("copy", [True, False])
+def test_merge_dict_deep(benchmark, copy):
+    a = _make_deep(500, 1)
+    b = _make_deep(500, 2)
+    benchmark(merge_dict, a, b, copy=copy)
@@ -0,0 +1,28 @@
+import pytest
+from attrs import frozen
+from oes.util.blacksheep import JSONResponseFunc, make_json_converter
+
+
+@frozen
+class Item:
+    id: int
+    name: str
+    price: float
+    tags: tuple[str, ...] = ()
+
+
+def _make_func(path):
+    converter = make_json_converter()
+    if path == "hooks":
+        return JSONResponseFunc(converter=converter)
+    else:
+        # unstructure through the default callback, without cached hooks
+        return JSONResponseFunc(default=converter.unstructure)
+
+
+@pytest.mark.parametrize("count", [10, 10000])
+@pytest.mark.parametrize("path", ["hooks", "default"])
+def test_json_response_attrs_list(benchmark, path, count):
+    func = _make_func(path)
+    items = [Item(i, f"Item {i}", i * 1.5, ("a", "b")) for i in range(count)]
+    benchmark(func, items)
@@ -0,0 +1,28 @@
+import os
+
+import pytest
+from oes.util import (
+    urlsafe_b64decode,
+    urlsafe_b64decode_many,
+    urlsafe_b64encode,
+    urlsafe_b64encode_many,
+)
+
+
+@pytest.mark.parametrize("size", [16, 1024, 65536])
+def test_urlsafe_b64encode(benchmark, size):
+    benchmark(urlsafe_b64encode, os.urandom(size))
+
+
+@pytest.mark.parametrize("size", [16, 1024, 65536])
+def test_urlsafe_b64decode(benchmark, size):
+    benchmark(urlsafe_b64decode, urlsafe_b64encode(os.urandom(size)))
+
+
+def test_urlsafe_b64encode_many(benchmark):
+    benchmark(urlsafe_b64encode_many, [os.urandom(16) for _ in range(1000)])
+
+
+def test_urlsafe_b64decode_many(benchmark):
+    items = [urlsafe_b64encode(os.urandom(16)) for _ in range(1000)]
+    benchmark(urlsafe_b64decode_many, items)
@@ -1,19 +1,53 @@
 """OES shared utilities library."""
 
-from .attrs import is_attrs_class, is_attrs_instance
-from .cattrs import ExceptionDetails, get_exception_details
-from .merge_dict import merge_dict
-from .urlsafe_base64 import urlsafe_b64decode, urlsafe_b64encode
+from .attrs import (
+    AttrsClassInfo,
+    AttrsField,
+    get_attrs_class_info,
+    get_type_kind,
+    is_attrs_class,
+    is_attrs_instance,
+)
+from .cattrs import ExceptionDetails, get_exception_details, get_exception_dicts
+from .merge_cache import FrozenDict, MergeCache, content_hash, freeze
+from .merge_dict import CopyOnWriteDict, MergedView, merge_dict, merge_dicts
+from .urlsafe_base64 import (
+    urlsafe_b64decode,
+    urlsafe_b64decode_bytes,
+    urlsafe_b64decode_into,
+    urlsafe_b64decode_many,
+    urlsafe_b64encode,
+    urlsafe_b64encode_bytes,
+    urlsafe_b64encode_many,
+)
 
 __all__ = [
     "merge_dict",
+    "merge_dicts",
+    "MergedView",
+    "CopyOnWriteDict",
+    "MergeCache",
+    "content_hash",
+    "freeze",
+    "FrozenDict",
     "is_attrs_class",
     "is_attrs_instance",
+    "AttrsClassInfo",
+    "AttrsField",
+    "get_attrs_class_info",
+    "get_type_kind",
     "ExceptionDetails",
     "get_exception_details",
+    "get_exception_dicts",
     "urlsafe_b64encode",
     "urlsafe_b64decode",
+    "urlsafe_b64encode_bytes",
+    "urlsafe_b64decode_bytes",
+    "urlsafe_b64decode_into",
+    "urlsafe_b64encode_many",
+    "urlsafe_b64decode_many",
     # modules
     "blacksheep",
     "logging",
+    "tracing",
 ]
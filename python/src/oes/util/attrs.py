@@ -2,12 +2,21 @@
 from __future__ import annotations
 
 import contextlib
-from typing import Type
+import typing
+from collections.abc import Mapping, MutableMapping, MutableSequence, MutableSet
+from collections.abc import Sequence as SequenceABC
+from collections.abc import Set
+from typing import Any, Literal, NamedTuple, Type, Union, get_args, get_origin
+from weakref import WeakKeyDictionary
 
-from typing_extensions import TypeGuard
+from typing_extensions import TypeAlias, TypeGuard
 
 with contextlib.suppress(ImportError):
-    from attrs import AttrsInstance
+    from attrs import Attribute, AttrsInstance, fields
+
+TypeKind: TypeAlias = Literal[
+    "sequence", "mapping", "literal", "union", "attrs", "other"
+]
 
 
 def is_attrs_instance(obj: object) -> TypeGuard[AttrsInstance]:
@@ -18,3 +27,124 @@ def is_attrs_instance(obj: object) -> TypeGuard[AttrsInstance]:
 def is_attrs_class(obj: object) -> TypeGuard[Type[AttrsInstance]]:
     """Get whether the given object is a :obj:`attrs` class."""
     return isinstance(obj, type) and hasattr(obj, "__attrs_attrs__")
+
+
+class AttrsField(NamedTuple):
+    """Metadata of an :obj:`attrs` field.
+
+    Attributes:
+        name: The field name.
+        type: The field type, with string annotations resolved.
+        optional: Whether the type is a union including ``None``.
+        kind: The classification of the type, see :func:`get_type_kind`.
+        attribute: The :class:`attrs.Attribute`.
+    """
+
+    name: str
+    type: Any
+    optional: bool
+    kind: TypeKind
+    attribute: Attribute
+
+
+class AttrsClassInfo(NamedTuple):
+    """Metadata of an :obj:`attrs` class.
+
+    Attributes:
+        fields: The fields.
+        type_hints: The resolved field types by name.
+    """
+
+    fields: tuple[AttrsField, ...]
+    type_hints: Mapping[str, Any]
+
+
+_class_info: WeakKeyDictionary[type, AttrsClassInfo] = WeakKeyDictionary()
+
+
+def get_attrs_class_info(cls: type) -> AttrsClassInfo:
+    """Get the metadata of an :obj:`attrs` class.
+
+    The metadata is computed once per class, and kept until the class is
+    garbage collected. Types that cannot be resolved are left as they are.
+
+    Raises:
+        TypeError: If the class is not an :obj:`attrs` class.
+    """
+    info = _class_info.get(cls)
+    if info is None:
+        info = _make_attrs_class_info(cls)
+        _class_info[cls] = info
+    return info
+
+
+def _make_attrs_class_info(cls: type) -> AttrsClassInfo:
+    if not is_attrs_class(cls):  # noqa: NEW100
+        raise TypeError(f"{cls!r} is not an attrs class")
+
+    try:
+        hints = typing.get_type_hints(cls)
+    except (NameError, TypeError):
+        hints = {}
+
+    attrs_fields = []
+    for a in fields(cls):
+        t = hints.get(a.name, a.type)
+        attrs_fields.append(
+            AttrsField(a.name, t, is_optional(t), get_type_kind(t), a)  # noqa: NEW100
+        )
+
+    return AttrsClassInfo(
+        fields=tuple(attrs_fields),
+        type_hints={f.name: f.type for f in attrs_fields},
+    )
+
+
+def get_type_kind(t: object) -> TypeKind:
+    """Classify a type.
+
+    Returns:
+        ``"sequence"`` for homogeneous sequences and sets, ``"mapping"``,
+        ``"literal"``, ``"union"``, ``"attrs"`` for :obj:`attrs` classes,
+        or ``"other"``.
+    """
+    origin = get_origin(t)
+    if origin in _SEQUENCE_TYPES and _is_homogeneous(get_args(t)):
+        return "sequence"
+    elif origin in _MAPPING_TYPES:
+        return "mapping"
+    elif origin is Literal:
+        return "literal"
+    elif origin is Union:
+        return "union"
+    elif is_attrs_class(t):  # noqa: NEW100
+        return "attrs"
+    else:
+        return "other"
+
+
+def is_optional(t: object) -> bool:
+    """Get whether a type is a union including ``None``."""
+    return get_origin(t) is Union and type(None) in get_args(t)
+
+
+_SEQUENCE_TYPES = (
+    SequenceABC,
+    MutableSequence,
+    list,
+    tuple,
+    set,
+    frozenset,
+    Set,
+    MutableSet,
+)
+
+_MAPPING_TYPES = (
+    Mapping,
+    MutableMapping,
+    dict,
+)
+
+
+def _is_homogeneous(args: tuple[Any, ...]) -> bool:
+    return len(args) == 1 or len(args) == 2 and args[1] is Ellipsis
@@ -1,26 +1,73 @@
 """Blacksheep helpers."""
 
-from .attrs_handler import AttrsBinder, AttrsTypeHandler, FromAttrs
+from .attrs_handler import (
+    AttrsBinder,
+    AttrsListBinder,
+    AttrsTypeHandler,
+    FromAttrs,
+    FromAttrsList,
+)
+from .body import iter_lines, read_body
 from .docs import DocsHelper
-from .middleware import configure_cors, configure_forwarded_headers
+from .metrics import Histogram, MetricsRegistry
+from .middleware import (
+    configure_compression,
+    configure_cors,
+    configure_etags,
+    configure_forwarded_headers,
+    configure_log_context,
+    configure_metrics,
+    configure_tracing,
+)
 from .response import (
+    CachedContent,
     Conflict,
     JSONResponseFunc,
+    PayloadTooLarge,
     PreconditionFailed,
     PreconditionRequired,
+    UnprocessableEntity,
     check_404,
+    check_if_match,
+    check_not_modified,
+    configure_unprocessable_entity,
+    make_encoded_etag,
+    make_json_converter,
+    make_version_etag,
+    unprocessable_entity_handler,
 )
 
 __all__ = [
     "AttrsTypeHandler",
     "FromAttrs",
     "AttrsBinder",
+    "FromAttrsList",
+    "AttrsListBinder",
     "DocsHelper",
+    "configure_compression",
     "configure_cors",
+    "configure_etags",
     "configure_forwarded_headers",
+    "configure_log_context",
+    "configure_metrics",
+    "configure_tracing",
+    "Histogram",
+    "MetricsRegistry",
+    "read_body",
+    "iter_lines",
+    "CachedContent",
     "Conflict",
+    "PayloadTooLarge",
     "PreconditionFailed",
     "PreconditionRequired",
+    "UnprocessableEntity",
+    "configure_unprocessable_entity",
+    "unprocessable_entity_handler",
     "JSONResponseFunc",
+    "make_json_converter",
+    "make_encoded_etag",
+    "make_version_etag",
     "check_404",
+    "check_if_match",
+    "check_not_modified",
 ]
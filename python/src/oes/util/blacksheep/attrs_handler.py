@@ -1,34 +1,54 @@
 """``attrs`` docs handler."""
 from __future__ import annotations
 
-from collections.abc import (
-    Mapping,
-    MutableMapping,
-    MutableSequence,
-    MutableSet,
-    Sequence,
-    Set,
-)
-from typing import Any, Literal, Type, TypeVar, Union, get_args, get_origin
+import asyncio
+import functools
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, ClassVar, Optional, Type, TypeVar, Union, get_args
+from weakref import WeakKeyDictionary
 
 import orjson
-from attrs import Attribute, fields
 from blacksheep import HTTPException, Request
-from blacksheep.server.bindings import BodyBinder, BoundValue, InvalidRequestBody
+from blacksheep.server.bindings import (
+    BodyBinder,
+    BoundValue,
+    InvalidRequestBody,
+    MissingBodyError,
+)
 from blacksheep.server.openapi.v3 import FieldInfo, ObjectTypeHandler, OpenAPIHandler
 from cattrs import BaseValidationError, Converter
 from cattrs.preconf.orjson import make_converter
-from oes.util import is_attrs_class
-from openapidocs.v3 import Schema, ValueType
+from oes.util import ExceptionDetails, get_exception_details, is_attrs_class
+from oes.util.attrs import TypeKind, get_attrs_class_info, get_type_kind
+from oes.util.blacksheep.body import iter_lines, read_body
+from oes.util.blacksheep.metrics import binder_seconds, get_type_name
+from oes.util.blacksheep.response import UnprocessableEntity
+from oes.util.tracing import span
+from openapidocs.v3 import Reference, Schema, ValueType
 
 _T = TypeVar("_T")
 
+StructureHook = Callable[[Any, Any], Any]
+
+_structure_hooks: WeakKeyDictionary[
+    Converter, dict[Any, StructureHook]
+] = WeakKeyDictionary()
+
 
 class AttrsTypeHandler(ObjectTypeHandler):
     """Handler for OpenAPI schemas for ``attrs`` classes."""
 
-    def __init__(self, docs: OpenAPIHandler):
+    def __init__(self, docs: OpenAPIHandler, *, use_refs: bool = False):
+        """Create an attrs type handler.
+
+        Args:
+            docs: The :class:`OpenAPIHandler`.
+            use_refs: Register nested ``attrs`` classes as components and
+                reference them instead of inlining their schemas.
+        """
         self._docs = docs
+        self._cache = SchemaCache(use_refs=use_refs)
 
     def handles_type(self, object_type: Any) -> bool:
         return is_attrs_class(object_type)
@@ -36,15 +56,27 @@ class AttrsTypeHandler(ObjectTypeHandler):
     def get_type_fields(self, object_type: Any) -> list[FieldInfo]:
         info_list = []
 
-        attr: Attribute
-        for attr in fields(object_type):
-            info_list.append(
-                FieldInfo(name=attr.name, type=_get_field_type(self._docs, attr.type))
+        for field in get_attrs_class_info(object_type).fields:
+            field_type = _get_field_type(
+                self._docs, field.type, cache=self._cache, kind=field.kind
             )
+            if isinstance(field_type, Reference):
+                # the docs handler looks up the registered reference by type
+                field_type = field.type
+            info_list.append(FieldInfo(name=field.name, type=field_type))
 
         return info_list
 
 
+class SchemaCache:
+    """Cache of generated schemas, by type and nullability."""
+
+    def __init__(self, *, use_refs: bool = False):
+        self.use_refs = use_refs
+        self.schemas: dict[tuple[Any, bool], Union[Schema, Reference, Type]] = {}
+        self.refs: dict[Any, Reference] = {}
+
+
 class FromAttrs(BoundValue[_T]):
     """Attrs body value."""
 
@@ -52,9 +84,42 @@ class FromAttrs(BoundValue[_T]):
 class AttrsBinder(BodyBinder):
     """Attrs body binder."""
 
-    handle = FromAttrs
+    handle: ClassVar[type[BoundValue]] = FromAttrs
     cattrs_converter: Converter = make_converter()
 
+    # the maximum request body size in bytes, or None for no limit
+    max_body_size: Optional[int] = None
+
+    # read the body in chunks even when there is no size limit
+    read_incrementally: bool = False
+
+    # decode and structure bodies of at least offload_threshold bytes in this
+    # executor instead of on the event loop
+    executor: Optional[Executor] = None
+    offload_threshold: int = 65536
+
+    def __init__(
+        self,
+        expected_type: Any,
+        name: str = "body",
+        implicit: bool = False,
+        required: bool = False,
+        converter: Optional[Callable] = None,
+    ):
+        super().__init__(expected_type, name, implicit, required, converter)
+        self._structure_hook = get_structure_hook(self.cattrs_converter, expected_type)
+        self._type_name = get_type_name(expected_type)
+
+    @classmethod
+    def warm_up(cls, *types: Any):
+        """Build and cache the structure hooks for the given types ahead of time.
+
+        Binders resolve their hook when the app normalizes its routes at startup,
+        so this is only needed for types that are not bound to a route.
+        """
+        for t in types:
+            get_structure_hook(cls.cattrs_converter, t)
+
     @property
     def content_type(self) -> str:
         return "application/json"
@@ -62,43 +127,283 @@ class AttrsBinder(BodyBinder):
     def matches_content_type(self, request: Request) -> bool:
         return request.declares_json()
 
-    async def read_data(self, request: Request) -> Any:
-        body = await request.read()
+    async def get_value(self, request: Request) -> Any:
+        if (
+            self.executor is not None
+            and request.method not in self._excluded_methods
+            and self.matches_content_type(request)
+        ):
+            return await self._get_value_offloaded(request, self.executor)
+        return await super().get_value(request)
 
-        if body:
-            try:
-                return orjson.loads(body)
-            except ValueError:
-                raise InvalidRequestBody
-        else:
-            return None
+    async def read_data(self, request: Request) -> Any:
+        with _Stage(self._type_name, "read"):
+            body = await self._read_body(request)
+            return _decode(body) if body else None
 
     def parse_value(self, data: dict) -> Any:
         try:
-            return self.cattrs_converter.structure(data, self.expected_type)
+            with _Stage(self._type_name, "parse"):
+                return self._structure_hook(data, self.expected_type)
+        except BaseValidationError:
+            raise HTTPException(422, "Invalid request body")
+
+    async def _read_body(self, request: Request) -> Union[bytes, bytearray, None]:
+        if self.read_incrementally or self.max_body_size is not None:
+            return await read_body(request, self.max_body_size)
+        else:
+            return await request.read()
+
+    async def _get_value_offloaded(self, request: Request, executor: Executor) -> Any:
+        with _Stage(self._type_name, "read"):
+            body = await self._read_body(request)
+        if not body:
+            raise MissingBodyError
+        elif len(body) < self.offload_threshold:
+            data = _decode(body)
+            if not data:
+                raise MissingBodyError
+            return self.parse_value(data)
+
+        func = self._get_offloaded_func(executor, body)
+        try:
+            with _Stage(self._type_name, "parse"):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, func)
+        except orjson.JSONDecodeError:
+            raise InvalidRequestBody
         except BaseValidationError:
             raise HTTPException(422, "Invalid request body")
 
+    def _get_offloaded_func(
+        self, executor: Executor, body: Union[bytes, bytearray]
+    ) -> Callable[[], Any]:
+        if isinstance(executor, ProcessPoolExecutor):
+            # the hook can't be pickled, look it up again in the worker
+            return functools.partial(
+                _structure_in_process, type(self), bytes(body), self.expected_type
+            )
+        else:
+            return functools.partial(
+                _decode_and_structure, self._structure_hook, body, self.expected_type
+            )
+
+
+class FromAttrsList(BoundValue[list[_T]]):
+    """Attrs list body value."""
+
+
+class AttrsListBinder(AttrsBinder):
+    """Binder for a JSON array or newline-delimited JSON body of attrs instances.
+
+    Items are structured one at a time, yielding to the event loop after every
+    :attr:`batch_size` items. Newline-delimited JSON is decoded line by line as
+    it is received. A JSON array is not incremental: the whole body is read,
+    up to :attr:`max_body_size`, and decoded in one call before its items are
+    structured, so large uploads should use newline-delimited JSON. Validation
+    errors are reported per item through :class:`UnprocessableEntity`.
+    """
+
+    handle = FromAttrsList
+
+    # items to structure before yielding to the event loop
+    batch_size: int = 1000
+
+    # stop after this many invalid items
+    max_errors: int = 100
+
+    @property
+    def content_type(self) -> str:
+        return "application/json;application/x-ndjson"
+
+    def matches_content_type(self, request: Request) -> bool:
+        return request.declares_json() or _declares_ndjson(request)
+
+    async def get_value(self, request: Request) -> Any:
+        if request.method not in self._excluded_methods and self.matches_content_type(
+            request
+        ):
+            if _declares_ndjson(request):
+                # lines are parsed as they are read
+                with _Stage(self._type_name, "parse"):
+                    return await self._read_ndjson(request)
+            else:
+                return await self._read_json_array(request)
+        return await super().get_value(request)
+
+    async def _read_json_array(self, request: Request) -> list[Any]:
+        data = await self.read_data(request)
+        if data is None:
+            raise MissingBodyError
+        elif not isinstance(data, list):
+            raise InvalidRequestBody("Expected a JSON array")
+
+        with _Stage(self._type_name, "parse"):
+            return await self._structure_items(data)
+
+    async def _structure_items(self, data: list[Any]) -> list[Any]:
+        errors: list[ExceptionDetails] = []
+
+        # structure in place to avoid holding a second list
+        for i, item in enumerate(data):
+            data[i] = self._structure_item(i, item, errors)
+            self._check_errors(errors, self.max_errors)
+            if (i + 1) % self.batch_size == 0:
+                await asyncio.sleep(0)
+
+        self._check_errors(errors)
+        return data
+
+    async def _read_ndjson(self, request: Request) -> list[Any]:
+        items: list[Any] = []
+        errors: list[ExceptionDetails] = []
+
+        async for line in iter_lines(request, self.max_body_size):
+            if not line.strip():
+                continue
+
+            i = len(items)
+            try:
+                item = orjson.loads(line)
+            except ValueError:
+                errors.append(ExceptionDetails((i,), "Invalid JSON"))
+                items.append(None)
+            else:
+                items.append(self._structure_item(i, item, errors))
+
+            self._check_errors(errors, self.max_errors)
+            if (i + 1) % self.batch_size == 0:
+                await asyncio.sleep(0)
+
+        self._check_errors(errors)
+        return items
+
+    def _structure_item(self, i: int, item: Any, errors: list[ExceptionDetails]) -> Any:
+        try:
+            return self._structure_hook(item, self.expected_type)
+        except BaseValidationError as e:
+            errors.extend(
+                get_exception_details(
+                    e, path=(i,), max_errors=self.max_errors - len(errors)
+                )
+            )
+            return None
+
+    def _check_errors(self, errors: list[ExceptionDetails], limit: int = 1):
+        if len(errors) >= limit:
+            raise UnprocessableEntity("Invalid request body", errors)
+
+
+class _Stage:
+    # records the time spent in a stage as a metric and a span
+    __slots__ = ("timer", "span")
+
+    def __init__(self, type_name: str, stage: str):
+        self.timer = binder_seconds.time(type_name, stage)
+        self.span = span(f"binder.{stage}", type=type_name)
+
+    def __enter__(self):
+        self.timer.__enter__()
+        self.span.__enter__()
+
+    def __exit__(self, *exc: Any):
+        self.span.__exit__(*exc)
+        self.timer.__exit__(*exc)
+
+
+def _decode(body: Union[bytes, bytearray]) -> Any:
+    try:
+        return orjson.loads(body)
+    except ValueError:
+        raise InvalidRequestBody
+
+
+def _structure_in_process(binder_type: type[AttrsBinder], body: bytes, t: Any) -> Any:
+    hook = get_structure_hook(binder_type.cattrs_converter, t)
+    return _decode_and_structure(hook, body, t)
+
+
+def _decode_and_structure(
+    hook: StructureHook, body: Union[bytes, bytearray], t: Any
+) -> Any:
+    return hook(orjson.loads(body), t)
+
+
+def get_structure_hook(converter: Converter, t: Any) -> StructureHook:
+    """Get the cached structure hook for a type.
+
+    The hook is resolved with :meth:`cattrs.Converter.get_structure_hook` once
+    and reused for later calls. Hooks registered on the converter after a
+    type's hook has been cached are not picked up for that type.
+
+    Args:
+        converter: The converter.
+        t: The type to structure.
+
+    Returns:
+        A function taking the unstructured data and the type.
+    """
+    hooks = _structure_hooks.get(converter)
+    if hooks is None:
+        hooks = {}
+        _structure_hooks[converter] = hooks
+
+    hook = hooks.get(t)
+    if hook is None:
+        hook = converter.get_structure_hook(t)
+        hooks[t] = hook
+    return hook
+
 
 def _get_field_type(
-    docs: OpenAPIHandler, t: object, nullable: bool = False
-) -> Union[Schema, Type]:
-    """Get a type or :class:`Schema` for the given type."""
-    if _is_sequence(t):
-        return _get_schema_for_sequence(docs, t, nullable)
-    elif _is_mapping(t):
+    docs: OpenAPIHandler,
+    t: object,
+    nullable: bool = False,
+    cache: Optional[SchemaCache] = None,
+    kind: Optional[TypeKind] = None,
+) -> Union[Schema, Reference, Type]:
+    """Get a type or :class:`Schema` for the given type.
+
+    ``kind`` may be passed when the type is already classified, such as the
+    :attr:`oes.util.AttrsField.kind` of a field.
+    """
+    if cache is None:
+        return _make_field_type(docs, t, nullable, cache, kind)
+
+    key = (t, nullable)
+    result = cache.schemas.get(key)
+    if result is None:
+        result = _make_field_type(docs, t, nullable, cache, kind)
+        cache.schemas[key] = result
+    return result
+
+
+def _make_field_type(
+    docs: OpenAPIHandler,
+    t: object,
+    nullable: bool,
+    cache: Optional[SchemaCache],
+    kind: Optional[TypeKind] = None,
+) -> Union[Schema, Reference, Type]:
+    if kind is None:
+        kind = get_type_kind(t)
+    if kind == "sequence":
+        return _get_schema_for_sequence(docs, t, nullable, cache)
+    elif kind == "mapping":
         return _get_schema_for_mapping(docs, t, nullable)
-    elif _is_literal(t):
+    elif kind == "literal":
         return _get_schema_for_literal(docs, t, nullable)
-    elif _is_union(t):
-        return _get_schema_for_union(docs, t)
-    elif is_attrs_class(t):
-        return _get_schema_for_attrs_class(docs, t, nullable)
+    elif kind == "union":
+        return _get_schema_for_union(docs, t, cache)
+    elif kind == "attrs":
+        return _get_schema_or_reference_for_attrs_class(docs, t, nullable, cache)
     else:
         return docs.get_schema_by_type(t, root_optional=nullable)
 
 
-def _get_schema_for_union(docs: OpenAPIHandler, t: object) -> Schema:
+def _get_schema_for_union(
+    docs: OpenAPIHandler, t: object, cache: Optional[SchemaCache]
+) -> Union[Schema, Reference, Type]:
     args = get_args(t)
 
     nullable = type(None) in args
@@ -106,18 +411,22 @@ def _get_schema_for_union(docs: OpenAPIHandler, t: object) -> Schema:
 
     if len(args) == 2 and nullable:
         opt_t = non_null_args[0]
-        return _get_field_type(docs, opt_t, nullable)  # noqa: NEW100
+        return _get_field_type(docs, opt_t, nullable, cache)  # noqa: NEW100
     else:
-        schemas = [_get_field_type(docs, a) for a in non_null_args]  # noqa: NEW100
+        schemas = [
+            _get_field_type(docs, a, cache=cache) for a in non_null_args  # noqa: NEW100
+        ]
         return Schema(one_of=schemas, nullable=nullable)
 
 
-def _get_schema_for_sequence(docs: OpenAPIHandler, t: object, nullable: bool) -> Schema:
+def _get_schema_for_sequence(
+    docs: OpenAPIHandler, t: object, nullable: bool, cache: Optional[SchemaCache]
+) -> Schema:
     args = get_args(t)
     # TODO: does not handle heterogeneous tuples
     return Schema(
         type=ValueType.ARRAY,
-        items=_get_field_type(docs, args[0]),
+        items=_get_field_type(docs, args[0], cache=cache),
         nullable=nullable,
     )
 
@@ -135,56 +444,47 @@ def _get_schema_for_literal(docs: OpenAPIHandler, t: object, nullable: bool) ->
     )
 
 
-def _get_schema_for_attrs_class(docs: OpenAPIHandler, t: Any, nullable: bool) -> Schema:
+def _get_schema_or_reference_for_attrs_class(
+    docs: OpenAPIHandler, t: Any, nullable: bool, cache: Optional[SchemaCache]
+) -> Union[Schema, Reference]:
+    if cache is not None and cache.use_refs:
+        return _get_reference_for_attrs_class(docs, t, nullable, cache)
+    else:
+        return _get_schema_for_attrs_class(docs, t, nullable, cache)
+
+
+def _get_reference_for_attrs_class(
+    docs: OpenAPIHandler, t: Any, nullable: bool, cache: SchemaCache
+) -> Union[Schema, Reference]:
+    ref = cache.refs.get(t)
+    if ref is None:
+        docs.set_type_schema(t, _get_schema_for_attrs_class(docs, t, False, cache))
+        ref = docs.get_schema_by_type(t)
+        cache.refs[t] = ref
+
+    # siblings of a $ref are ignored, wrap it to make it nullable
+    return Schema(all_of=[ref], nullable=True) if nullable else ref
+
+
+def _get_schema_for_attrs_class(
+    docs: OpenAPIHandler, t: Any, nullable: bool, cache: Optional[SchemaCache]
+) -> Schema:
+    properties = {}
+    required = []
+    for field in get_attrs_class_info(t).fields:
+        properties[field.name] = _get_field_type(  # noqa: NEW100
+            docs, field.type, cache=cache, kind=field.kind
+        )
+        if not field.optional:
+            required.append(field.name)
+
     return Schema(
         type=ValueType.OBJECT,
-        properties={a.name: _get_field_type(docs, a.type) for a in fields(t)},
+        properties=properties,
         nullable=nullable,
-        required=[a.name for a in fields(t) if not _is_optional(a.type)],
-    )
-
-
-def _is_optional(t: object) -> bool:
-    origin = get_origin(t)
-    args = get_args(t)
-
-    return origin is Union and type(None) in args
-
-
-def _is_union(t: object) -> bool:
-    return get_origin(t) is Union
-
-
-def _is_optional_union(t: object) -> bool:
-    origin = get_origin(t)
-    args = get_args(t)
-
-    return origin is Union and len(args) == 2 and type(None) in args
-
-
-def _is_sequence(t: object) -> bool:
-    origin = get_origin(t)
-    args = get_args(t)
-    return origin in (
-        Sequence,
-        MutableSequence,
-        list,
-        tuple,
-        set,
-        frozenset,
-        Set,
-        MutableSet,
-    ) and (len(args) == 1 or len(args) == 2 and args[1] is Ellipsis)
-
-
-def _is_mapping(t: object) -> bool:
-    origin = get_origin(t)
-    return origin in (
-        Mapping,
-        MutableMapping,
-        dict,
+        required=required,
     )
 
 
-def _is_literal(t: object) -> bool:
-    return get_origin(t) == Literal
+def _declares_ndjson(request: Request) -> bool:
+    return request.declares_content_type(b"application/x-ndjson")
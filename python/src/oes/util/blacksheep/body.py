@@ -0,0 +1,170 @@
+"""Request body helpers."""
+from __future__ import annotations
+
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from typing import Optional
+
+from blacksheep import Content, Request
+from blacksheep.server.bindings import InvalidRequestBody
+from oes.util.blacksheep.response import PayloadTooLarge
+
+
+async def read_body(
+    request: Request, max_size: Optional[int] = None
+) -> Optional[bytes]:
+    """Read a request body, optionally limiting its size.
+
+    The declared ``Content-Length`` is checked before anything is read. When it
+    is present and within the limit, the chunks are copied into a single buffer
+    of that size, otherwise the buffer grows as chunks arrive and the running
+    size is checked against the limit. Without a limit, no buffer is allocated
+    from the client's ``Content-Length`` alone. The body is kept on the
+    request, so later calls to :meth:`Request.read` return it.
+
+    Args:
+        request: The request.
+        max_size: The maximum body size in bytes, or ``None`` for no limit.
+
+    Returns:
+        The body, or ``None`` if the request has no content.
+
+    Raises:
+        PayloadTooLarge: If the body is larger than ``max_size``.
+        InvalidRequestBody: If the body does not match its ``Content-Length``.
+    """
+    content = request.content
+    if content is None:
+        return None
+
+    if content.body is not None:
+        # already read
+        _check_size(len(content.body), max_size)
+        return content.body
+
+    length = _get_content_length(request)
+    if length is not None and max_size is not None:
+        _check_size(length, max_size)
+        buf = await _read_exact(content, length)
+    else:
+        buf = await _read_chunks(content, max_size, length)
+
+    # keep the body for later reads, like Request.read() does
+    body = bytes(buf)
+    request.content = Content(content.type, body)
+    return body
+
+
+async def iter_lines(
+    request: Request, max_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """Iterate the lines of a request body as they are received.
+
+    The body is not kept, so it cannot be read again afterwards.
+
+    Args:
+        request: The request.
+        max_size: The maximum body size in bytes, or ``None`` for no limit.
+
+    Raises:
+        PayloadTooLarge: If the body is larger than ``max_size``.
+    """
+    content = request.content
+    if content is None:
+        return
+
+    if content.body is not None:
+        _check_size(len(content.body), max_size)
+        for line in content.body.split(b"\n"):
+            yield line
+        return
+
+    length = _get_content_length(request)
+    if length is not None:
+        _check_size(length, max_size)
+
+    size = 0
+    buf = bytearray()
+    async for chunk in _stream(content):
+        size += len(chunk)
+        _check_size(size, max_size)
+        for line in _split_lines(buf, chunk):
+            yield line
+
+    if buf:
+        yield bytes(buf)
+
+
+def _split_lines(buf: bytearray, chunk: bytes) -> list[bytes]:
+    # only the new chunk is searched, the partial line is kept in buf
+    end = chunk.find(b"\n")
+    if end == -1:
+        buf += chunk
+        return []
+
+    buf += chunk[:end]
+    first = bytes(buf)
+    buf.clear()
+    *lines, tail = chunk[end + 1 :].split(b"\n")
+    buf += tail
+    return [first, *lines]
+
+
+def _get_content_length(request: Request) -> Optional[int]:
+    value = request.get_first_header(b"content-length")
+    if value is None:
+        return None
+
+    try:
+        length = int(value)
+    except ValueError:
+        raise InvalidRequestBody("Invalid Content-Length")
+
+    if length < 0:
+        raise InvalidRequestBody("Invalid Content-Length")
+
+    return length
+
+
+async def _read_exact(content: Content, length: int) -> bytearray:
+    buf = bytearray(length)
+    pos = 0
+    with memoryview(buf) as view:
+        async for chunk in _stream(content):
+            end = pos + len(chunk)
+            if end > length:
+                raise InvalidRequestBody("Request body exceeds Content-Length")
+            view[pos:end] = chunk
+            pos = end
+
+    if pos != length:
+        raise InvalidRequestBody("Incomplete request body")
+
+    return buf
+
+
+async def _read_chunks(
+    content: Content, max_size: Optional[int], length: Optional[int] = None
+) -> bytearray:
+    buf = bytearray()
+    async for chunk in _stream(content):
+        buf.extend(chunk)
+        _check_size(len(buf), max_size)
+        if length is not None and len(buf) > length:
+            raise InvalidRequestBody("Request body exceeds Content-Length")
+
+    if length is not None and len(buf) != length:
+        raise InvalidRequestBody("Incomplete request body")
+
+    return buf
+
+
+def _stream(content: Content) -> AsyncIterable[bytes]:
+    # content without a body is streamed, the stubs only declare stream() on
+    # some of the streamed content types
+    stream: Callable[[], AsyncIterable[bytes]] = getattr(content, "stream")
+    return stream()
+
+
+def _check_size(size: int, max_size: Optional[int]):
+    if max_size is not None and size > max_size:
+        raise PayloadTooLarge
@@ -0,0 +1,114 @@
+"""Compression helpers."""
+from __future__ import annotations
+
+import gzip
+from collections.abc import Callable, Iterable
+from typing import Any, Optional
+
+# installed with the brotli extra
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# installed with the zstandard extra
+zstandard: Any
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# the supported content encodings, in order of preference
+ENCODINGS: tuple[str, ...] = tuple(
+    name
+    for name, module in (("br", brotli), ("zstd", zstandard), ("gzip", gzip))
+    if module is not None
+)
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress data with the given content encoding.
+
+    Args:
+        data: The data.
+        encoding: The content encoding, one of :data:`ENCODINGS`.
+        level: The compression level, or ``None`` for the encoder's default.
+
+    Returns:
+        The compressed data.
+    """
+    func = _compress_funcs.get(encoding) if encoding in ENCODINGS else None
+    if func is None:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    return func(data, level)
+
+
+def _gzip(data: bytes, level: Optional[int]) -> bytes:
+    return gzip.compress(data, 6 if level is None else level, mtime=0)
+
+
+def _brotli(data: bytes, level: Optional[int]) -> bytes:
+    return brotli.compress(data, quality=11 if level is None else level)
+
+
+def _zstd(data: bytes, level: Optional[int]) -> bytes:
+    return zstandard.compress(data, 3 if level is None else level)
+
+
+_compress_funcs: dict[str, Callable[[bytes, Optional[int]], bytes]] = {
+    "gzip": _gzip,
+    "br": _brotli,
+    "zstd": _zstd,
+}
+
+
+def negotiate_encoding(
+    accept_encoding: Optional[bytes], encodings: Iterable[str] = ENCODINGS
+) -> Optional[str]:
+    """Choose a content encoding from an ``Accept-Encoding`` header.
+
+    Args:
+        accept_encoding: The header value.
+        encodings: The available encodings, in order of preference.
+
+    Returns:
+        The encoding with the highest quality value, or ``None`` for identity.
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = _parse_accept_encoding(accept_encoding)
+    default = accepted.get("*", 0.0)
+
+    best = None
+    best_q = 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, default)
+        if q > best_q:
+            best = encoding
+            best_q = q
+
+    return best
+
+
+def _parse_accept_encoding(accept_encoding: bytes) -> dict[str, float]:
+    accepted = {}
+    for item in accept_encoding.decode("latin-1").split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        accepted[name] = _parse_quality(params)
+    return accepted
+
+
+def _parse_quality(params: str) -> float:
+    params = params.strip()
+    if not params.startswith("q="):
+        return 1.0
+
+    try:
+        return float(params[2:])
+    except ValueError:
+        return 0.0
@@ -1,7 +1,9 @@
 """Docs helpers."""
-from collections.abc import Callable, Mapping
+from collections.abc import Awaitable, Callable, Mapping
 from typing import Any, Optional, TypeVar, Union
 
+import orjson
+from blacksheep import Application, Request, Response
 from blacksheep.server.openapi.common import (
     ContentInfo,
     ParameterInfo,
@@ -10,6 +12,9 @@ from blacksheep.server.openapi.common import (
     ResponseStatusType,
 )
 from blacksheep.server.openapi.v3 import OpenAPIHandler
+from oes.util.blacksheep.response import CachedContent
+from openapidocs.common import Serializer
+from openapidocs.v3 import OpenAPI
 from typing_extensions import ParamSpec
 
 _P = ParamSpec("_P")
@@ -21,6 +26,7 @@ class DocsHelper:
 
     def __init__(self, docs: OpenAPIHandler):
         self._docs = docs
+        self._cached_json: Optional[CachedContent] = None
 
     def __call__(
         self,
@@ -60,3 +66,30 @@ class DocsHelper:
             deprecated=deprecated,
             on_created=on_created,
         )
+
+    def use_cached_json(self, app: Application):
+        """Serve the JSON document pre-serialized and pre-compressed.
+
+        The document is serialized once with :mod:`orjson` when it is generated
+        at startup, and requests to the JSON spec path are answered from the
+        cached variants, with ETag and ``304 Not Modified`` support.
+        """
+        self._docs.events.on_docs_created(self._on_docs_created)
+        app.middlewares.append(self._cached_json_middleware)
+
+    def _on_docs_created(self, docs_handler: OpenAPIHandler, docs: OpenAPI):
+        body = orjson.dumps(Serializer().to_obj(docs))
+        self._cached_json = CachedContent(
+            b"application/json", body, cache_control=b"no-cache"
+        )
+
+    async def _cached_json_middleware(
+        self, request: Request, handler: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        if (
+            self._cached_json is not None
+            and request.method in ("GET", "HEAD")
+            and request.path == self._docs.json_spec_path
+        ):
+            return self._cached_json.get_response(request)
+        return await handler(request)
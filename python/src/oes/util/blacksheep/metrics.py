@@ -0,0 +1,180 @@
+"""Metrics module."""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any, Optional
+
+# the default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# the default size buckets, in bytes
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+_null_timer = nullcontext()
+
+
+class MetricsRegistry:
+    """Registry of metrics, rendered in the Prometheus text format.
+
+    Metrics are only recorded while the registry is enabled.
+    """
+
+    def __init__(self, *, enabled: bool = False):
+        """Create a metrics registry."""
+        self.enabled = enabled
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        *,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram.
+
+        Args:
+            name: The metric name.
+            help: The help text.
+            labels: The label names.
+            buckets: The upper bounds of the buckets.
+        """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = Histogram(self, name, help, labels, buckets)
+                self._histograms[name] = histogram
+            return histogram
+
+    def render(self) -> bytes:
+        """Render the metrics in the Prometheus text format."""
+        with self._lock:
+            histograms = list(self._histograms.values())
+        lines = [line for h in histograms for line in h.render()]
+        return "".join(f"{line}\n" for line in lines).encode()
+
+
+class Histogram:
+    """Histogram metric, optionally with labels."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        name: str,
+        help: str,
+        labels: Sequence[str],
+        buckets: Sequence[float],
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._registry = registry
+        self._values: dict[tuple[str, ...], _HistogramValue] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        """Record a value, if the registry is enabled.
+
+        Args:
+            value: The value.
+            labels: The label values, in the order of the label names.
+        """
+        if not self._registry.enabled:
+            return
+
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = _HistogramValue(len(self.buckets) + 1)
+                self._values[labels] = entry
+            entry.counts[bisect_left(self.buckets, value)] += 1
+            entry.sum += value
+
+    def time(self, *labels: str) -> AbstractContextManager[Any]:
+        """Get a context manager recording the time spent in it, in seconds."""
+        if not self._registry.enabled:
+            return _null_timer
+        return _Timer(self, labels)
+
+    def render(self) -> list[str]:
+        """Render the histogram in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = [(k, list(v.counts), v.sum) for k, v in self._values.items()]
+
+        bounds = [_format_float(b) for b in self.buckets] + ["+Inf"]
+        for label_values, counts, sum_ in values:
+            labels = list(zip(self.labels, label_values))
+            total = 0
+            for bound, count in zip(bounds, counts):
+                total += count
+                le_labels = _format_labels(labels + [("le", bound)])
+                lines.append(f"{self.name}_bucket{le_labels} {total}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {sum_!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {total}")
+        return lines
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    formatted = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f"{{{formatted}}}" if formatted else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def get_type_name(t: Any) -> str:
+    """Get a short name for a type, for use as a label."""
+    name: Optional[str] = getattr(t, "__qualname__", None)
+    return name if name is not None and not hasattr(t, "__args__") else repr(t)
+
+
+registry = MetricsRegistry()
+"""The default registry."""
+
+binder_seconds = registry.histogram(
+    "oes_binder_seconds",
+    "Time spent reading and parsing request bodies.",
+    labels=("type", "stage"),
+)
+
+serializer_seconds = registry.histogram(
+    "oes_serializer_seconds",
+    "Time spent serializing JSON responses.",
+)
@@ -1,38 +1,747 @@
 """Middlewares module."""
-from collections.abc import Iterable
-from ipaddress import ip_network
-from typing import Union
+import asyncio
+import contextlib
+import importlib.util
+import os
+import re
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from concurrent.futures import Executor
+from ipaddress import IPv4Network, IPv6Address, IPv6Network, ip_address, ip_network
+from typing import Optional, Pattern, Union
 
-from blacksheep import Application
-from blacksheep.server.remotes.forwarding import XForwardedHeadersMiddleware
+from blacksheep import Application, Content, Request, Response
+from blacksheep.headers import Headers
+from blacksheep.server.remotes.forwarding import (
+    InvalidProxyIPError,
+    IPAddress,
+    TooManyHeaders,
+    XForwardedHeadersMiddleware,
+)
+from blacksheep.server.websocket import WebSocket
+from oes.util.blacksheep.compression import ENCODINGS, compress, negotiate_encoding
+from oes.util.blacksheep.metrics import SIZE_BUCKETS, MetricsRegistry, registry
+from oes.util.blacksheep.response import etag_matches, make_encoded_etag, make_etag
+from oes.util.tracing import SpanSink, set_sink, span
+from oes.util.urlsafe_base64 import urlsafe_b64encode
 
+with contextlib.suppress(ImportError):
+    from loguru import logger
 
-def configure_forwarded_headers(app: Application):
+# content types that are compressed by default
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/*",
+)
+
+_Handler = Callable[[Request], Awaitable[Response]]
+
+# compression levels suited to compressing each response
+_DEFAULT_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}
+
+
+def configure_forwarded_headers(
+    app: Application,
+    *,
+    trusted_networks: Optional[Iterable[Union[str, IPv4Network, IPv6Network]]] = None,
+    forward_limit: int = 1,
+    cache_size: int = 1024,
+):
     """Configure an app to accept ``X-Forwarded`` headers.
 
+    Trusted networks are merged into sorted address ranges, so large lists of
+    networks are checked in logarithmic time. Parsed ``X-Forwarded-For``
+    values are cached.
+
+    Args:
+        app: The app.
+        trusted_networks: The networks of trusted proxies. Every address is
+            trusted by default.
+        forward_limit: The maximum number of ``X-Forwarded-For`` addresses.
+        cache_size: The maximum number of cached ``X-Forwarded-For`` values.
+
     References:
         https://www.neoteroi.dev/blacksheep/remotes/#handling-x-forwarded-headers
     """
+    networks = (
+        (ip_network("0.0.0.0/0"), ip_network("::/0"))
+        if trusted_networks is None
+        else (ip_network(n) for n in trusted_networks)
+    )
     app.middlewares.insert(
         0,
-        XForwardedHeadersMiddleware(
-            known_networks=(ip_network("0.0.0.0/0"), ip_network("::/0"))
+        _TrustedProxiesMiddleware(
+            _NetworkIndex(networks), forward_limit=forward_limit, cache_size=cache_size
         ),
     )
 
 
+class _TrustedProxiesMiddleware(XForwardedHeadersMiddleware):
+    def __init__(
+        self, networks: "_NetworkIndex", *, forward_limit: int, cache_size: int
+    ):
+        super().__init__(forward_limit=forward_limit)
+        self.networks = networks
+        self.cache_size = cache_size
+        self._forwarded_for: OrderedDict[bytes, tuple[IPAddress, ...]] = OrderedDict()
+
+    def should_validate_client_ip(self) -> bool:
+        return True
+
+    def validate_proxy_ip(self, proxy_ip: IPAddress):
+        if proxy_ip not in self.networks:
+            raise InvalidProxyIPError(proxy_ip)
+
+    def get_forwarded_for(self, headers: Headers) -> list[IPAddress]:
+        values = headers[self.forwarded_for_header_name]
+        if not values:
+            return []
+        elif len(values) > 1:
+            raise TooManyHeaders(self.forwarded_for_header_name)
+
+        value = values[0]
+        addresses = self._forwarded_for.get(value)
+        if addresses is not None:
+            self._forwarded_for.move_to_end(value)
+        else:
+            addresses = _parse_forwarded_for(value)
+            self._forwarded_for[value] = addresses
+            if len(self._forwarded_for) > self.cache_size:
+                self._forwarded_for.popitem(last=False)
+        return list(addresses)
+
+
+def _parse_forwarded_for(value: bytes) -> tuple[IPAddress, ...]:
+    # X-Forwarded-For: <client>, <proxy1>, <proxy2>
+    parts = (p.strip() for p in value.decode("latin-1").split(","))
+    return tuple(ip_address(p) for p in parts if p)
+
+
+class _NetworkIndex:
+    def __init__(self, networks: Iterable[Union[IPv4Network, IPv6Network]]):
+        ranges: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for network in networks:
+            ranges[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+
+        # sorted, non-overlapping ranges, as separate lists of starts and ends
+        self._ranges = {
+            version: tuple(zip(*_merge_ranges(r))) or ((), ())
+            for version, r in ranges.items()
+        }
+
+    def __contains__(self, address: IPAddress) -> bool:
+        if isinstance(address, IPv6Address) and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        starts, ends = self._ranges[address.version]
+        value = int(address)
+        i = bisect_right(starts, value) - 1
+        return i >= 0 and value <= ends[i]
+
+
+def _merge_ranges(ranges: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
 def configure_cors(
     app: Application,
     *,
-    allow_origins: Union[str, Iterable[str], None] = None,
+    allow_origins: Union[str, Iterable[Union[str, Pattern[str]]], None] = None,
     allow_methods: Union[str, Iterable[str]] = "*",
     allow_headers: Union[str, Iterable[str], None] = None,
+    allow_credentials: bool = False,
+    expose_headers: Union[str, Iterable[str], None] = None,
     max_age: int = 600,
+    cache_size: int = 1024,
 ):
-    """Configure an app to set CORS headers."""
-    app.use_cors(
-        allow_origins=allow_origins,
-        allow_methods=allow_methods,
-        allow_headers=allow_headers,
-        max_age=max_age,
+    """Configure an app to set CORS headers.
+
+    Origins may be exact, ``*`` to allow any origin, contain wildcards like
+    ``https://*.example.com`` or ``http://localhost:*``, or be compiled
+    regular expressions. Preflight responses are built once per origin,
+    method and requested headers, and cached.
+
+    Args:
+        app: The app.
+        allow_origins: The allowed origins.
+        allow_methods: The allowed methods, or ``*``.
+        allow_headers: The allowed request headers, or ``*``.
+        allow_credentials: Whether to allow credentials.
+        expose_headers: The response headers exposed to clients.
+        max_age: How long clients may cache preflight responses, in seconds.
+        cache_size: The maximum number of cached preflight responses.
+    """
+    app.middlewares.insert(
+        0,
+        _CORSMiddleware(
+            app,
+            _OriginMatcher(_split_origins(allow_origins)),
+            methods=frozenset(m.upper() for m in _split_values(allow_methods)),
+            headers=frozenset(h.lower() for h in _split_values(allow_headers)),
+            allow_credentials=allow_credentials,
+            expose_headers=", ".join(_split_values(expose_headers)).encode(),
+            max_age=max_age,
+            cache_size=cache_size,
+        ),
     )
+    # route preflight requests to the middleware
+    app.router.add_options("*", _options_handler)
+
+
+async def _options_handler(request: Request) -> Response:
+    return Response(404)
+
+
+def _split_origins(
+    value: Union[str, Iterable[Union[str, Pattern[str]]], None]
+) -> list[Union[str, Pattern[str]]]:
+    if value is None or isinstance(value, str):
+        return list(_split_values(value))
+    else:
+        return list(value)
+
+
+def _split_values(value: Union[str, Iterable[str], None]) -> list[str]:
+    if value is None:
+        return []
+    elif isinstance(value, str):
+        return [v for v in re.split(r"[\s,]+", value) if v]
+    else:
+        return list(value)
+
+
+class _OriginMatcher:
+    def __init__(self, origins: Iterable[Union[str, Pattern[str]]]):
+        strings = [o.lower() for o in origins if isinstance(o, str)]
+        patterns = [o.pattern for o in origins if not isinstance(o, str)]
+        patterns.extend(_wildcard_pattern(o) for o in strings if "*" in o and o != "*")
+
+        self.any = "*" in strings
+        self.exact = frozenset(o for o in strings if "*" not in o)
+        # all patterns are checked with a single regular expression
+        self.pattern = (
+            re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+            if patterns
+            else None
+        )
+
+    def __call__(self, origin: str) -> bool:
+        return (
+            self.any
+            or origin.lower() in self.exact
+            or self.pattern is not None
+            and self.pattern.fullmatch(origin) is not None
+        )
+
+
+def _wildcard_pattern(origin: str) -> str:
+    escaped = re.escape(origin).replace(r":\*", ":[0-9]+")
+    return escaped.replace(r"\*", r"[a-z0-9-]+(?:\.[a-z0-9-]+)*")
+
+
+_PreflightResult = tuple[int, tuple[tuple[bytes, bytes], ...]]
+
+
+class _CORSMiddleware:
+    def __init__(
+        self,
+        app: Application,
+        origins: _OriginMatcher,
+        *,
+        methods: frozenset[str],
+        headers: frozenset[str],
+        allow_credentials: bool,
+        expose_headers: bytes,
+        max_age: int,
+        cache_size: int,
+    ):
+        self.app = app
+        self.origins = origins
+        self.methods = methods
+        self.headers = headers
+        self.allow_credentials = allow_credentials
+        self.expose_headers = expose_headers
+        self.max_age = str(max_age).encode()
+        self.cache_size = cache_size
+        self._preflights: OrderedDict[
+            tuple[bytes, ...], _PreflightResult
+        ] = OrderedDict()
+
+    async def __call__(self, request: Request, handler: _Handler) -> Response:
+        origin = request.get_first_header(b"origin")
+        if not origin or isinstance(request, WebSocket):
+            return await handler(request)
+
+        method = request.get_first_header(b"access-control-request-method")
+        if method and request.method == "OPTIONS":
+            return self._handle_preflight(request, origin, method)
+        else:
+            return await self._handle_request(request, handler, origin)
+
+    def _handle_preflight(
+        self, request: Request, origin: bytes, method: bytes
+    ) -> Response:
+        # the catch-all OPTIONS route matches any path, check the real one
+        if self.app.router.get_matching_route(method, request.url.path) is None:
+            return Response(404)
+
+        requested = request.get_first_header(b"access-control-request-headers")
+        status, headers = self._get_preflight(origin, method, requested or b"")
+        return Response(status, list(headers))
+
+    async def _handle_request(
+        self, request: Request, handler: _Handler, origin: bytes
+    ) -> Response:
+        if not self.origins(origin.decode("latin-1")):
+            return _cors_error(b"Origin not allowed")
+        elif not self._is_method_allowed(request.method):
+            return _cors_error(b"Method not allowed")
+
+        # CORS headers are needed for clients to read error responses too
+        try:
+            response = await handler(request)
+        except Exception as exc:
+            response = await self.app.handle_request_handler_exception(request, exc)
+
+        for name, value in self._get_headers(origin):
+            response.add_header(name, value)
+        if self.expose_headers:
+            response.add_header(b"access-control-expose-headers", self.expose_headers)
+        return response
+
+    def _get_preflight(
+        self, origin: bytes, method: bytes, requested: bytes
+    ) -> _PreflightResult:
+        key = (origin, method, requested)
+        result = self._preflights.get(key)
+        if result is not None:
+            self._preflights.move_to_end(key)
+            return result
+
+        result = self._make_preflight(origin, method.decode("latin-1"), requested)
+        self._preflights[key] = result
+        if len(self._preflights) > self.cache_size:
+            self._preflights.popitem(last=False)
+        return result
+
+    def _make_preflight(
+        self, origin: bytes, method: str, requested: bytes
+    ) -> _PreflightResult:
+        if not self.origins(origin.decode("latin-1")):
+            return 400, ((b"cors-error", b"Origin not allowed"),)
+        elif not self._is_method_allowed(method):
+            return 400, ((b"cors-error", b"Method not allowed"),)
+        elif not self._are_headers_allowed(requested):
+            return 400, ((b"cors-error", b"Header not allowed"),)
+
+        allowed_methods = (
+            method if "*" in self.methods else ", ".join(sorted(self.methods))
+        )
+        headers = [
+            *self._get_headers(origin),
+            (b"access-control-allow-methods", allowed_methods.encode()),
+            (b"access-control-max-age", self.max_age),
+        ]
+        if requested:
+            headers.append((b"access-control-allow-headers", requested))
+        return 200, tuple(headers)
+
+    def _is_method_allowed(self, method: str) -> bool:
+        return "*" in self.methods or method.upper() in self.methods
+
+    def _are_headers_allowed(self, requested: bytes) -> bool:
+        if "*" in self.headers:
+            return True
+        names = (h.strip().lower() for h in requested.decode("latin-1").split(","))
+        return all(name in self.headers for name in names if name)
+
+    def _get_headers(self, origin: bytes) -> list[tuple[bytes, bytes]]:
+        if self.origins.any and not self.allow_credentials:
+            return [(b"access-control-allow-origin", b"*")]
+
+        headers = [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+        if self.allow_credentials:
+            headers.append((b"access-control-allow-credentials", b"true"))
+        return headers
+
+
+def _cors_error(message: bytes) -> Response:
+    return Response(400, [(b"cors-error", message)])
+
+
+def configure_compression(
+    app: Application,
+    *,
+    encodings: Iterable[str] = ENCODINGS,
+    min_size: int = 1024,
+    content_types: Iterable[str] = COMPRESSIBLE_TYPES,
+    levels: Optional[Mapping[str, int]] = None,
+    executor: Optional[Executor] = None,
+    offload_threshold: int = 1048576,
+):
+    """Configure an app to compress responses.
+
+    The encoding is negotiated from ``Accept-Encoding``. Responses that are
+    streamed, already encoded, or smaller than ``min_size`` are not compressed.
+    When an encoding is negotiated, the ``ETag`` of a response is replaced
+    with one for the encoding, made with :func:`make_encoded_etag`, whether
+    or not the body is compressed. A ``304 Not Modified`` response thus gets
+    the same ``ETag`` as the full response.
+
+    Args:
+        app: The application.
+        encodings: The encodings to use, in order of preference.
+        min_size: The minimum body size to compress.
+        content_types: The content types to compress. An entry like
+            ``text/*`` matches any subtype.
+        levels: Compression levels by encoding.
+        executor: An executor to compress large bodies in.
+        offload_threshold: The minimum body size to compress in ``executor``.
+    """
+    app.middlewares.append(
+        _CompressionMiddleware(
+            tuple(encodings),
+            min_size,
+            frozenset(t.lower() for t in content_types),
+            {**_DEFAULT_LEVELS, **(levels or {})},
+            executor,
+            offload_threshold,
+        )
+    )
+
+
+class _CompressionMiddleware:
+    def __init__(
+        self,
+        encodings: tuple[str, ...],
+        min_size: int,
+        content_types: frozenset[str],
+        levels: Mapping[str, int],
+        executor: Optional[Executor],
+        offload_threshold: int,
+    ):
+        self.encodings = encodings
+        self.min_size = min_size
+        self.content_types = content_types
+        self.levels = levels
+        self.executor = executor
+        self.offload_threshold = offload_threshold
+
+    async def __call__(
+        self, request: Request, handler: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        response = await handler(request)
+        if _is_negotiated(response):
+            return response
+
+        # the ETag depends on the encoding even if the body is not compressed,
+        # so a 304 gets the same ETag as the full response
+        content = self._get_compressible_content(response)
+        if content is None and not response.has_header(b"etag"):
+            return response
+
+        response.add_header(b"vary", b"Accept-Encoding")
+        encoding = negotiate_encoding(
+            request.get_first_header(b"accept-encoding"), self.encodings
+        )
+        if encoding is None:
+            return response
+
+        if content is not None:
+            body = await self._compress(content.body, encoding)
+            response.content = Content(content.type, body)
+            response.add_header(b"content-encoding", encoding.encode())
+        _set_encoded_etag(response, encoding)
+        return response
+
+    def _get_compressible_content(self, response: Response) -> Optional[Content]:
+        content = response.content
+        if (
+            content is not None
+            and content.body is not None
+            and len(content.body) >= self.min_size
+            and self._is_compressible_type(content.type)
+        ):
+            return content
+        else:
+            return None
+
+    def _is_compressible_type(self, content_type: bytes) -> bool:
+        media_type = content_type.partition(b";")[0].strip().lower().decode("latin-1")
+        main_type = media_type.partition("/")[0]
+        return (
+            media_type in self.content_types or f"{main_type}/*" in self.content_types
+        )
+
+    async def _compress(self, body: bytes, encoding: str) -> bytes:
+        level = self.levels.get(encoding)
+        if self.executor is not None and len(body) >= self.offload_threshold:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, compress, body, encoding, level
+            )
+        else:
+            return compress(body, encoding, level)
+
+
+def _is_negotiated(response: Response) -> bool:
+    # already encoded, or negotiated by the handler, like CachedContent
+    return response.has_header(b"content-encoding") or any(
+        b"accept-encoding" in v.lower() for v in response.get_headers(b"vary")
+    )
+
+
+def _set_encoded_etag(response: Response, encoding: str):
+    etag = response.get_first_header(b"etag")
+    if etag is not None:
+        response.set_header(b"etag", make_encoded_etag(etag, encoding))
+
+
+def configure_etags(app: Application):
+    """Configure an app to set ETags and answer conditional ``GET`` requests.
+
+    Successful ``GET`` and ``HEAD`` responses without an ``ETag`` get a strong
+    ETag computed from the body, and a matching ``If-None-Match`` is answered
+    with ``304 Not Modified`` without the body. Streamed responses are skipped.
+
+    To skip loading and serializing the body, handlers can check an ETag
+    themselves with :func:`check_not_modified`.
+
+    With :func:`configure_compression`, configure this afterwards, so ETags
+    are computed from the unencoded body and ``304`` responses are sent
+    without compressing the body. The compression middleware then gives
+    each encoding its own ETag, which still matches the unencoded one.
+    """
+    app.middlewares.append(_etag_middleware)
+
+
+async def _etag_middleware(
+    request: Request, handler: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    response = await handler(request)
+    if request.method not in ("GET", "HEAD") or response.status != 200:
+        return response
+
+    etag = response.get_first_header(b"etag")
+    if etag is None:
+        content = response.content
+        if content is None or content.body is None:
+            return response
+        etag = make_etag(content.body)
+        response.add_header(b"etag", etag)
+
+    if etag_matches(request.if_none_match, etag):
+        return Response(304, list(response.headers))
+
+    return response
+
+
+def configure_log_context(app: Application, *, header: bytes = b"x-request-id"):
+    """Configure an app to add request fields to :mod:`loguru` records.
+
+    Records logged while handling a request get ``request_id``, ``route`` and
+    ``client_ip`` extra fields, set with :meth:`loguru.Logger.contextualize`.
+    The request ID is taken from ``header``, or generated, and sent back in
+    the same response header. The client IP is the one from
+    :func:`configure_forwarded_headers`, if configured.
+
+    Args:
+        app: The application.
+        header: The request ID header.
+
+    Raises:
+        ImportError: If :mod:`loguru` is not installed.
+    """
+    if importlib.util.find_spec("loguru") is None:
+        raise ImportError("Log context fields require loguru, install oes.util[loguru]")
+
+    app.middlewares.append(_client_ip_middleware)
+
+    @app.after_start
+    async def wrap_route_handlers(app: Application):
+        for route in app.router:
+            route.handler = _with_log_context(
+                app, route.handler, route.pattern.decode(), header
+            )
+
+
+def _with_log_context(
+    app: Application, handler: _Handler, route: str, header: bytes
+) -> _Handler:
+    # wraps the whole middleware chain, so that its records have the fields
+    async def handle(request: Request) -> Response:
+        request_id = _get_request_id(request, header)
+        with logger.contextualize(request_id=request_id, route=route):
+            try:
+                response = await handler(request)
+            except Exception as exc:
+                # log and render errors here, within the context
+                response = await app.handle_request_handler_exception(request, exc)
+        response.set_header(header, request_id.encode())
+        return response
+
+    return handle
+
+
+def _get_request_id(request: Request, header: bytes) -> str:
+    request_id = request.get_first_header(header)
+    if request_id and len(request_id) <= 128:
+        return request_id.decode("latin-1")
+    return urlsafe_b64encode(os.urandom(12))
+
+
+async def _client_ip_middleware(request: Request, handler: _Handler) -> Response:
+    # runs after the forwarded headers middleware, if configured
+    with logger.contextualize(client_ip=request.original_client_ip):
+        return await handler(request)
+
+
+def configure_metrics(app: Application, *, path: str = "/metrics"):
+    """Configure an app to record metrics and serve them at ``path``.
+
+    Enables the default :data:`registry`, and records the latency and the
+    request and response body sizes of each route, along with the time
+    :class:`AttrsBinder` spends reading and parsing bodies and the time
+    :class:`JSONResponseFunc` spends serializing them, including streamed
+    responses. Requests for the metrics themselves are not recorded. Metrics
+    are served in the Prometheus text format.
+
+    Args:
+        app: The application.
+        path: The path to serve the metrics at.
+    """
+    registry.enabled = True
+    metrics = _RouteMetrics(registry)
+
+    async def get_metrics() -> Response:
+        return Response(
+            200, None, Content(b"text/plain; version=0.0.4", registry.render())
+        )
+
+    app.router.add_get(path, get_metrics)
+
+    @app.after_start
+    async def wrap_route_handlers(app: Application):
+        # handlers are wrapped by the time the app starts, so compare paths
+        for route in app.router:
+            if route.pattern.decode() != path:
+                route.handler = _with_metrics(
+                    route.handler, route.pattern.decode(), metrics
+                )
+
+
+class _RouteMetrics:
+    def __init__(self, registry: MetricsRegistry):
+        self.duration = registry.histogram(
+            "oes_http_request_duration_seconds",
+            "Time spent handling requests.",
+            labels=("method", "route", "status"),
+        )
+        self.request_size = registry.histogram(
+            "oes_http_request_size_bytes",
+            "Request body sizes.",
+            labels=("method", "route"),
+            buckets=SIZE_BUCKETS,
+        )
+        self.response_size = registry.histogram(
+            "oes_http_response_size_bytes",
+            "Response body sizes, if known.",
+            labels=("method", "route", "status"),
+            buckets=SIZE_BUCKETS,
+        )
+
+    def observe(
+        self,
+        request: Request,
+        route: str,
+        response: Optional[Response],
+        status: int,
+        duration: float,
+    ):
+        status_str = str(status)
+        self.duration.observe(duration, request.method, route, status_str)
+
+        request_size = _get_request_size(request)
+        if request_size >= 0:
+            self.request_size.observe(request_size, request.method, route)
+
+        content = response.content if response is not None else None
+        response_size = content.length if content is not None else 0
+        if response_size >= 0:
+            self.response_size.observe(response_size, request.method, route, status_str)
+
+
+def _get_request_size(request: Request) -> int:
+    # use the body that was read if there is no Content-Length
+    value = request.get_first_header(b"content-length")
+    if value is not None and value.isdigit():
+        return int(value)
+
+    content = request.content
+    if content is None:
+        return 0
+    elif content.body is not None:
+        return len(content.body)
+    else:
+        return -1
+
+
+def _with_metrics(handler: _Handler, route: str, metrics: _RouteMetrics) -> _Handler:
+    async def handle(request: Request) -> Response:
+        start = time.perf_counter()
+        try:
+            response = await handler(request)
+        except Exception as e:
+            status = getattr(e, "status", 500)
+            metrics.observe(request, route, None, status, time.perf_counter() - start)
+            raise
+
+        duration = time.perf_counter() - start
+        metrics.observe(request, route, response, response.status, duration)
+        return response
+
+    return handle
+
+
+def configure_tracing(app: Application, sink: SpanSink):
+    """Configure an app to trace requests.
+
+    Sets the :mod:`oes.util.tracing` sink, and runs each route's handler and
+    middlewares in a ``request`` span with ``method``, ``route`` and ``status``
+    attributes. :class:`AttrsBinder` and :class:`JSONResponseFunc` record
+    ``binder.read``, ``binder.parse`` and ``serialize`` child spans.
+
+    Args:
+        app: The application.
+        sink: The span sink.
+    """
+    set_sink(sink)
+
+    @app.after_start
+    async def wrap_route_handlers(app: Application):
+        for route in app.router:
+            route.handler = _with_span(route.handler, route.pattern.decode())
+
+
+def _with_span(handler: _Handler, route: str) -> _Handler:
+    async def handle(request: Request) -> Response:
+        with span("request", method=request.method, route=route) as request_span:
+            response = await handler(request)
+            if request_span is not None:
+                request_span.set_attribute("status", response.status)
+            return response
+
+    return handle
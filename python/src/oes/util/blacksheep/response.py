@@ -1,12 +1,30 @@
 """Response helpers."""
 from __future__ import annotations
 
-from collections.abc import Callable, Iterable
-from typing import Any, Optional, TypeVar
+import hashlib
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Sequence
+from datetime import date, datetime
+from typing import Any, Optional, TypeVar, Union, cast
 
 import orjson
-from blacksheep import Content, HTTPException, Response
+from blacksheep import (
+    Application,
+    Content,
+    HTTPException,
+    Request,
+    Response,
+    StreamedContent,
+)
 from blacksheep.exceptions import NotFound
+from cattrs import Converter
+from cattrs.preconf.orjson import make_converter
+from oes.util.attrs import is_attrs_class
+from oes.util.blacksheep.compression import ENCODINGS, compress, negotiate_encoding
+from oes.util.blacksheep.metrics import serializer_seconds
+from oes.util.cattrs import ExceptionDetails
+from oes.util.tracing import span
+from oes.util.urlsafe_base64 import urlsafe_b64encode
 
 
 class Conflict(HTTPException):
@@ -23,6 +41,48 @@ class PreconditionFailed(HTTPException):
         super().__init__(412, message)
 
 
+class PayloadTooLarge(HTTPException):
+    """HTTP 413."""
+
+    def __init__(self, message: str = "Payload Too Large"):
+        super().__init__(413, message)
+
+
+class UnprocessableEntity(HTTPException):
+    """HTTP 422."""
+
+    def __init__(
+        self,
+        message: str = "Unprocessable Entity",
+        details: Sequence[ExceptionDetails] = (),
+    ):
+        super().__init__(422, message)
+        self.details = details
+
+
+def configure_unprocessable_entity(app: Application):
+    """Configure an app to list validation errors in HTTP 422 responses.
+
+    See :func:`unprocessable_entity_handler`.
+    """
+    app.exceptions_handlers[422] = unprocessable_entity_handler
+
+
+async def unprocessable_entity_handler(
+    app: Application, request: Request, exc: HTTPException
+) -> Response:
+    """Exception handler for HTTP 422 errors.
+
+    The response is a JSON object with the ``message`` and the ``errors``, a
+    list of objects with the ``path`` and ``message`` of each of the
+    :attr:`UnprocessableEntity.details`.
+    """
+    details = exc.details if isinstance(exc, UnprocessableEntity) else ()
+    errors = [{"path": d.path, "message": d.message} for d in details]
+    body = orjson.dumps({"message": str(exc), "errors": errors})
+    return Response(422, None, Content(b"application/json", body))
+
+
 class PreconditionRequired(HTTPException):
     """HTTP 428."""
 
@@ -33,13 +93,24 @@ class PreconditionRequired(HTTPException):
 class JSONResponseFunc:
     """Callable to create a JSON response."""
 
-    def __init__(self, default: Optional[Callable[[Any], Any]] = None):
+    def __init__(
+        self,
+        default: Optional[Callable[[Any], Any]] = None,
+        *,
+        converter: Optional[Converter] = None,
+    ):
         """Create a JSON response func.
 
         Args:
             default: A JSON ``default`` callable.
+            converter: A converter to unstructure ``attrs`` instances with.
+                Each instance is unstructured as orjson reaches it, with the
+                unstructure hook of its class, which is looked up once and
+                cached.
         """
         self._default = default
+        self._converter = converter
+        self._hooks: dict[type, Callable[[Any], Any]] = {}
 
     def __call__(
         self,
@@ -50,15 +121,311 @@ class JSONResponseFunc:
         headers: Optional[Iterable[tuple[bytes, bytes]]] = None,
     ) -> Response:
         """Return a JSON response."""
+        with serializer_seconds.time(), span("serialize"):
+            body = self.dumps(obj)
+
         return Response(
             status_code,
             list(headers) if headers is not None else None,
             Content(
                 b"application/json",
-                orjson.dumps(obj, default=self._default),
+                body,
             ),
         )
 
+    def stream(
+        self,
+        items: Union[Iterable[object], AsyncIterable[object]],
+        /,
+        *,
+        ndjson: bool = False,
+        status_code: int = 200,
+        headers: Optional[Iterable[tuple[bytes, bytes]]] = None,
+        chunk_size: int = 65536,
+    ) -> Response:
+        """Return a chunked JSON array or NDJSON response.
+
+        Items are serialized one at a time as the response is sent, and
+        written in chunks of about ``chunk_size`` bytes. The status code is
+        sent before the items are iterated, so errors cannot change it.
+
+        Args:
+            items: A sync or async iterable of items.
+            ndjson: Whether to send newline-delimited JSON instead of an array.
+            status_code: The status code.
+            headers: Additional headers.
+            chunk_size: The number of bytes to buffer before sending a chunk.
+        """
+        encode = _encode_ndjson if ndjson else _encode_array
+
+        async def provider():
+            # record the time spent serializing the whole stream
+            dumps = _TimedDumps(self.dumps)
+            try:
+                parts = encode(_aiter(items), dumps)
+                async for chunk in _buffer(parts, chunk_size):
+                    yield chunk
+            finally:
+                serializer_seconds.observe(dumps.seconds)
+
+        return Response(
+            status_code,
+            list(headers) if headers is not None else None,
+            StreamedContent(
+                b"application/x-ndjson" if ndjson else b"application/json",
+                provider,
+            ),
+        )
+
+    def dumps(self, obj: object, /) -> bytes:
+        """Serialize an object to JSON."""
+        if self._converter is None:
+            return orjson.dumps(obj, default=self._default)
+        else:
+            return orjson.dumps(obj, default=self._default_with_converter)
+
+    def _default_with_converter(self, obj: object) -> object:
+        hook = self._hooks.get(type(obj))
+        if hook is None:
+            hook = self._get_hook(type(obj))
+        return hook(obj)
+
+    def _get_hook(self, cls: type) -> Callable[[Any], Any]:
+        if is_attrs_class(cls):
+            # only called when a converter is set
+            converter = cast(Converter, self._converter)
+            hook = converter.get_unstructure_hook(cls)
+        elif self._default is not None:
+            hook = self._default
+        else:
+            hook = _unsupported_type
+        self._hooks[cls] = hook
+        return hook
+
+
+def _unsupported_type(obj: object) -> Any:
+    raise TypeError
+
+
+class _TimedDumps:
+    def __init__(self, dumps: Callable[[object], bytes]):
+        self.dumps = dumps
+        self.seconds = 0.0
+
+    def __call__(self, obj: object) -> bytes:
+        start = time.perf_counter()
+        try:
+            return self.dumps(obj)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+async def _aiter(
+    items: Union[Iterable[object], AsyncIterable[object]]
+) -> AsyncIterator[object]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _encode_array(
+    items: AsyncIterable[object], dumps: Callable[[object], bytes]
+) -> AsyncIterator[bytes]:
+    sep = b"["
+    async for item in items:
+        yield sep + dumps(item)
+        sep = b","
+    yield b"]" if sep == b"," else b"[]"
+
+
+async def _encode_ndjson(
+    items: AsyncIterable[object], dumps: Callable[[object], bytes]
+) -> AsyncIterator[bytes]:
+    async for item in items:
+        yield dumps(item) + b"\n"
+
+
+async def _buffer(parts: AsyncIterable[bytes], size: int) -> AsyncIterator[bytes]:
+    buf = bytearray()
+    async for part in parts:
+        buf += part
+        if len(buf) >= size:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+
+def make_json_converter() -> Converter:
+    """Make a converter for use with :class:`JSONResponseFunc`.
+
+    This is the :mod:`cattrs` ``orjson`` preconfigured converter, except that
+    dates and datetimes are passed through for :mod:`orjson` to serialize.
+    """
+    converter = make_converter()
+    for t in (date, datetime):
+        converter.register_unstructure_hook(t, _passthrough)
+    return converter
+
+
+def _passthrough(value: Any) -> Any:
+    return value
+
+
+class CachedContent:
+    """Pre-compressed content with strong ETags.
+
+    The body is compressed once with each supported encoding, and responses
+    are negotiated from ``Accept-Encoding``, answering a matching
+    ``If-None-Match`` with ``304 Not Modified``. Each encoding gets its own
+    ETag, made with :func:`make_encoded_etag`.
+    """
+
+    def __init__(
+        self,
+        content_type: bytes,
+        body: bytes,
+        *,
+        encodings: Iterable[str] = ENCODINGS,
+        cache_control: Optional[bytes] = None,
+    ):
+        """Create cached content.
+
+        Args:
+            content_type: The content type.
+            body: The body.
+            encodings: The encodings to pre-compress the body with.
+            cache_control: A ``Cache-Control`` header value.
+        """
+        self.content_type = content_type
+        self.etag = make_etag(body)
+        # the ETag and body of each encoding
+        self._variants: dict[Optional[str], tuple[bytes, bytes]] = {
+            None: (self.etag, body)
+        }
+        self._variants.update(
+            (e, (make_encoded_etag(self.etag, e), compress(body, e))) for e in encodings
+        )
+        self._encodings = tuple(encodings)
+        self._cache_control = cache_control
+
+    def get_response(self, request: Request) -> Response:
+        """Get a response for the request."""
+        encoding = negotiate_encoding(
+            request.get_first_header(b"accept-encoding"), self._encodings
+        )
+        etag, body = self._variants[encoding]
+
+        headers = [(b"etag", etag), (b"vary", b"Accept-Encoding")]
+        if self._cache_control is not None:
+            headers.append((b"cache-control", self._cache_control))
+
+        if etag_matches(request.if_none_match, etag):
+            return Response(304, headers)
+
+        if encoding is not None:
+            headers.append((b"content-encoding", encoding.encode()))
+
+        return Response(200, headers, Content(self.content_type, body))
+
+
+def check_not_modified(request: Request, etag: bytes) -> Optional[Response]:
+    """Check a request's ``If-None-Match`` header.
+
+    Call this before loading or serializing the response body.
+
+    Returns:
+        A ``304 Not Modified`` response if the header matches ``etag``,
+        otherwise ``None``.
+    """
+    if etag_matches(request.if_none_match, etag):
+        return Response(304, [(b"etag", etag)])
+    return None
+
+
+def check_if_match(
+    request: Request, etag: Optional[bytes], *, required: bool = True
+) -> None:
+    """Check a request's ``If-Match`` header.
+
+    Args:
+        request: The request.
+        etag: The current ETag, or ``None`` if the resource does not exist.
+        required: Whether the header is required.
+
+    Raises:
+        PreconditionRequired: If the header is required and missing.
+        PreconditionFailed: If the header does not match ``etag``.
+    """
+    header = request.get_first_header(b"if-match")
+    if header is None:
+        if required:
+            raise PreconditionRequired
+        return
+
+    if etag is None or not etag_matches(header, etag, weak=False):
+        raise PreconditionFailed
+
+
+def make_version_etag(version: object) -> bytes:
+    """Make a strong ETag from a version token, such as a revision number."""
+    return make_etag(str(version).encode())
+
+
+def make_etag(data: bytes) -> bytes:
+    """Make a strong ETag from the given data."""
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    return b'"' + urlsafe_b64encode(digest).encode() + b'"'
+
+
+def make_encoded_etag(etag: bytes, encoding: str) -> bytes:
+    """Make the ETag of a representation encoded with ``encoding``.
+
+    The encoding is appended to the opaque tag, so that each encoding of a
+    body has a distinct ETag. The weak comparison of :func:`etag_matches`
+    matches these ETags with the ETag they were made from.
+    """
+    return etag[:-1] + b"-" + encoding.encode() + b'"'
+
+
+def etag_matches(header: Optional[bytes], etag: bytes, *, weak: bool = True) -> bool:
+    """Get whether an ``If-None-Match`` or ``If-Match`` header matches an ETag.
+
+    Uses the weak comparison function, or the strong comparison function, in
+    which weak ETags never match, if ``weak`` is ``False``. The weak comparison
+    also matches the ETags :func:`make_encoded_etag` makes from ``etag``. The
+    strong comparison is exact.
+    """
+    if header is None:
+        return False
+
+    header = header.strip()
+    if header == b"*":
+        return True
+
+    if weak:
+        opaque_tags = _get_encoded_etags(_strip_weak(etag))
+        return any(
+            _strip_weak(tag.strip()) in opaque_tags for tag in header.split(b",")
+        )
+    else:
+        return not etag.startswith(b"W/") and any(
+            tag.strip() == etag for tag in header.split(b",")
+        )
+
+
+def _strip_weak(etag: bytes) -> bytes:
+    return etag[2:] if etag.startswith(b"W/") else etag
+
+
+def _get_encoded_etags(etag: bytes) -> tuple[bytes, ...]:
+    # all supported encodings, installed or not
+    encodings = ("br", "zstd", "gzip")
+    return (etag, *(make_encoded_etag(etag, e) for e in encodings))  # noqa: NEW100
+
 
 _T = TypeVar("_T")
 
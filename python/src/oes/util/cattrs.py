@@ -2,8 +2,9 @@
 from __future__ import annotations
 
 import contextlib
+import itertools
 from collections.abc import Iterator
-from typing import Union
+from typing import Any, Optional, Union
 
 with contextlib.suppress(ImportError):
     from attrs import frozen
@@ -26,40 +27,101 @@ class ExceptionDetails:
     message: str = ""
 
 
-def get_exception_details(exc: Exception) -> list[ExceptionDetails]:
-    """Get a :class:`ExceptionDetails` list for a validation error."""
-    return list(_get_details(exc, ()))
-
-
-def _get_details(exc: Exception, path: ExcPath) -> Iterator[ExceptionDetails]:
-    if isinstance(exc, BaseValidationError):
-        yield from _get_group_error_details(exc, path)
-    elif isinstance(exc, KeyError):
-        yield _get_key_error_details(exc, path)
-    else:
-        yield ExceptionDetails(path, str(exc))
-
-
-def _get_group_error_details(
-    exc: BaseValidationError, path: ExcPath
-) -> Iterator[ExceptionDetails]:
-    path = _get_path_from_notes(exc, path)
-    for sub in exc.exceptions:
-        yield from _get_details(sub, path)  # noqa: NEW100
-
-
-def _get_path_from_notes(exc: BaseValidationError, path: ExcPath) -> ExcPath:
+def get_exception_details(
+    exc: Exception,
+    *,
+    path: ExcPath = (),
+    max_errors: Optional[int] = None,
+    deduplicate: bool = False,
+) -> list[ExceptionDetails]:
+    """Get a :class:`ExceptionDetails` list for a validation error.
+
+    Args:
+        exc: The exception.
+        path: A path to prefix the details' paths with.
+        max_errors: The maximum number of details to return.
+        deduplicate: Only return the first of the details with the same message.
+    """
+    return [
+        ExceptionDetails(p, m)
+        for p, m in _iter_details(exc, path, max_errors, deduplicate)
+    ]
+
+
+def get_exception_dicts(
+    exc: Exception,
+    *,
+    path: ExcPath = (),
+    max_errors: Optional[int] = None,
+    deduplicate: bool = False,
+) -> list[dict[str, Any]]:
+    """Get the details for a validation error as JSON serializable dicts.
+
+    Takes the same arguments as :func:`get_exception_details`.
+    """
+    return [
+        {"path": p, "message": m}
+        for p, m in _iter_details(exc, path, max_errors, deduplicate)
+    ]
+
+
+# a path as a linked list of (parent, key) nodes, to avoid copying tuples
+_PathNode: TypeAlias = Optional[tuple[Any, Union[str, int]]]
+
+
+def _iter_details(
+    exc: Exception, path: ExcPath, max_errors: Optional[int], deduplicate: bool
+) -> Iterator[tuple[ExcPath, str]]:
+    details = _walk(exc, path)
+    if deduplicate:
+        details = _deduplicate(details)
+    return itertools.islice(details, max_errors)
+
+
+def _walk(exc: Exception, path: ExcPath) -> Iterator[tuple[ExcPath, str]]:
+    stack: list[tuple[BaseException, _PathNode]] = [(exc, None)]
+
+    while stack:
+        cur, node = stack.pop()
+        if isinstance(cur, BaseValidationError):
+            node = _get_path_from_notes(cur, node)
+            stack.extend((sub, node) for sub in reversed(cur.exceptions))
+        elif isinstance(cur, KeyError):
+            yield _get_path(path, node), _get_key_error_message(cur)
+        else:
+            yield _get_path(path, node), str(cur)
+
+
+def _deduplicate(
+    details: Iterator[tuple[ExcPath, str]]
+) -> Iterator[tuple[ExcPath, str]]:
+    seen = set()
+    for detail in details:
+        if detail[1] not in seen:
+            seen.add(detail[1])
+            yield detail
+
+
+def _get_path_from_notes(exc: BaseValidationError, node: _PathNode) -> _PathNode:
     notes = getattr(exc, "__notes__", [])
     for note in notes:
         if isinstance(note, AttributeValidationNote):
-            return path + (note.name,)
+            return (node, note.name)
         elif isinstance(note, IterableValidationNote):
-            return path + (note.index,)
-    return path
+            return (node, note.index)
+    return node
+
+
+def _get_path(prefix: ExcPath, node: _PathNode) -> ExcPath:
+    keys = []
+    while node is not None:
+        node, key = node
+        keys.append(key)
+    return prefix + tuple(reversed(keys))
 
 
-def _get_key_error_details(exc: KeyError, path: ExcPath) -> ExceptionDetails:
+def _get_key_error_message(exc: KeyError) -> str:
     if len(exc.args) > 0:
-        return ExceptionDetails(path, f"A value is required for {exc.args[0]!r}")
+        return f"A value is required for {exc.args[0]!r}"
     else:
-        return ExceptionDetails(path, "A required value is missing")
+        return "A required value is missing"
@@ -2,37 +2,481 @@
 
 __all__ = [
     "InterceptHandler",
+    "JSONSink",
+    "LogLimiter",
+    "QueueSink",
+    "OverflowPolicy",
+    "configure_json_logging",
+    "format_json",
 ]
 
 
 import contextlib
+import importlib.util
 import logging
 import sys
+import threading
+import time
+import traceback
+from collections import deque
+from collections.abc import Callable, Mapping
+from types import FrameType
+from typing import Any, Literal, Optional, TextIO, Union
+
+from typing_extensions import TypeAlias
 
 with contextlib.suppress(ImportError):
     from loguru import logger
 
+with contextlib.suppress(ImportError):
+    import orjson
+
+# the number of frames between emit() and the logging call, at least
+_MIN_DEPTH = 6
+
 
 class InterceptHandler(logging.Handler):
     """Standard logging handler to send logs to :mod:`loguru`.
 
+    Level lookups and the stack depth of each logging call site are cached,
+    and records below the minimum level of every :mod:`loguru` handler are
+    dropped before any other work is done.
+
     References:
         https://loguru.readthedocs.io/en/stable/overview.html#entirely-compatible-with-standard-logging
     """
 
+    def __init__(self, level: Union[int, str] = logging.NOTSET):
+        """Create an intercept handler."""
+        super().__init__(level)
+        self._levels: dict[tuple[str, int], tuple[Union[str, int], int]] = {}
+        self._depths: dict[tuple[str, int], int] = {}
+
     def emit(self, record):
+        level, no = self._get_level(record)
+        if no < _get_min_level(logger):
+            return
+
+        logger.opt(depth=self._get_depth(record), exception=record.exc_info).log(
+            level, record.getMessage()
+        )
+
+    def _get_level(self, record: logging.LogRecord) -> tuple[Union[str, int], int]:
         # Get corresponding Loguru level if it exists.
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
+        key = (record.levelname, record.levelno)
+        level = self._levels.get(key)
+        if level is None:
+            try:
+                loguru_level = logger.level(record.levelname)
+                level = (loguru_level.name, loguru_level.no)
+            except ValueError:
+                level = (record.levelno, record.levelno)
+            self._levels[key] = level
+        return level
+
+    def _get_depth(self, record: logging.LogRecord) -> int:
+        # depths are relative to emit()
+        key = (record.pathname, record.lineno)
+        depth = self._depths.get(key)
+        if depth is not None and _is_caller(_get_frame(depth + 1), record):
+            return depth
 
         # Find caller from where originated the logged message.
-        frame, depth = sys._getframe(6), 6
+        frame, depth = _get_frame(_MIN_DEPTH + 1), _MIN_DEPTH
         while frame and frame.f_code.co_filename == logging.__file__:
             frame = frame.f_back
             depth += 1
 
-        logger.opt(depth=depth, exception=record.exc_info).log(
-            level, record.getMessage()
+        if _is_caller(frame, record):
+            self._depths[key] = depth
+        return depth
+
+
+def _get_min_level(logger: Any) -> int:
+    # the minimum level of all handlers is private to loguru, without it every
+    # record is passed on for loguru to filter
+    core = getattr(logger, "_core", None)
+    return getattr(core, "min_level", 0)
+
+
+def _get_frame(depth: int) -> Optional[FrameType]:
+    try:
+        # one more frame for this function
+        return sys._getframe(depth + 1)
+    except ValueError:
+        return None
+
+
+def _is_caller(frame: Optional[FrameType], record: logging.LogRecord) -> bool:
+    return (
+        frame is not None
+        and frame.f_lineno == record.lineno
+        and frame.f_code.co_filename == record.pathname
+    )
+
+
+class JSONSink:
+    """:mod:`loguru` sink that writes one JSON object per line.
+
+    Each object has the ``time``, ``level``, ``name``, ``function``, ``line``
+    and ``message`` of the record, an ``exception`` traceback if there is one,
+    and the record's ``extra`` fields, which include any fields set with
+    :meth:`loguru.Logger.contextualize` for the current context.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        """Create a JSON sink.
+
+        Args:
+            stream: The stream to write to, ``sys.stderr`` by default.
+
+        Raises:
+            ImportError: If :mod:`orjson` is not installed.
+        """
+        _require_orjson()
+        self.stream = sys.stderr if stream is None else stream
+
+    def __call__(self, message: Any):
+        self.stream.write(_format_json_message(message))
+        self.stream.flush()
+
+
+def _format_json_message(message: Any) -> str:
+    return format_json(message.record).decode()
+
+
+def format_json(record: Mapping[str, Any]) -> bytes:
+    """Serialize a :mod:`loguru` record to a line of JSON."""
+    data = {
+        **record["extra"],
+        "time": record["time"],
+        "level": record["level"].name,
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+
+    exception = record["exception"]
+    if exception is not None:
+        data["exception"] = "".join(traceback.format_exception(*exception))
+
+    return orjson.dumps(data, default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def configure_json_logging(
+    level: Union[int, str] = "INFO",
+    *,
+    stream: Optional[TextIO] = None,
+    enqueue: bool = False,
+    filter: Optional[Callable[[Any], bool]] = None,
+) -> Union[JSONSink, "QueueSink"]:
+    """Configure :mod:`loguru` and standard logging to write JSON lines.
+
+    Replaces the :mod:`loguru` handlers with a :class:`JSONSink`, or a
+    :class:`QueueSink` if ``enqueue`` is true, and sends standard logging
+    records to :mod:`loguru` with an :class:`InterceptHandler`.
+
+    Args:
+        level: The minimum level to log.
+        stream: The stream to write to, ``sys.stderr`` by default.
+        enqueue: Whether to write from a background thread.
+        filter: A :mod:`loguru` filter, such as a :class:`LogLimiter`.
+
+    Returns:
+        The sink.
+
+    Raises:
+        ImportError: If :mod:`orjson` is not installed.
+    """
+    sink: Union[JSONSink, QueueSink]
+    if enqueue:
+        _require_orjson()
+        sink = QueueSink(stream, formatter=_format_json_message)
+    else:
+        sink = JSONSink(stream)
+
+    logger.remove()
+    logger.add(sink, level=level, format="{message}", filter=filter)
+    logging.basicConfig(handlers=[InterceptHandler()], level=0, force=True)
+    return sink
+
+
+def _require_orjson():
+    # fail early, loguru would swallow the NameError on every write
+    if importlib.util.find_spec("orjson") is None:
+        raise ImportError("JSON logging requires orjson, install oes.util[loguru]")
+
+
+OverflowPolicy: TypeAlias = Literal["drop-oldest", "drop-debug", "block"]
+
+# records below this level are dropped by the "drop-debug" policy
+_DROP_DEBUG_BELOW = 20
+
+
+class QueueSink:
+    """:mod:`loguru` sink that writes records in batches from a background thread.
+
+    Records are added to a bounded queue, so a slow stream does not block the
+    thread that logged them. When the queue is full, the overflow policy is:
+
+    - ``"drop-oldest"``: drop the oldest queued record
+    - ``"drop-debug"``: drop the new record if it is below ``INFO``, otherwise
+      wait for space
+    - ``"block"``: wait for space
+
+    Attributes:
+        dropped: The number of records dropped.
+        written: The number of records written.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        *,
+        formatter: Callable[[Any], str] = str,
+        maxsize: int = 10000,
+        batch_size: int = 256,
+        overflow: OverflowPolicy = "drop-oldest",
+    ):
+        """Create a queue sink and start its thread.
+
+        Args:
+            stream: The stream to write to, ``sys.stderr`` by default.
+            formatter: A function to format a :mod:`loguru` message as a string.
+            maxsize: The maximum number of queued records.
+            batch_size: The maximum number of records per write.
+            overflow: The policy when the queue is full.
+        """
+        self.stream = sys.stderr if stream is None else stream
+        self.formatter = formatter
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.dropped = 0
+        self.written = 0
+
+        self._queue: deque[Any] = deque()
+        self._writing = 0
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="QueueSink", daemon=True)
+        self._thread.start()
+
+    @property
+    def queued(self) -> int:
+        """The number of queued records."""
+        return len(self._queue)
+
+    def write(self, message: Any):
+        """Queue a message."""
+        with self._cond:
+            if len(self._queue) >= self.maxsize and not self._make_room(message):
+                self.dropped += 1
+                return
+            self._queue.append(message)
+            self._cond.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued records are written.
+
+        Returns:
+            Whether the records were written before the timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._queue and not self._writing, timeout
+            )
+
+    def stop(self):
+        """Write the queued records and stop the thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _make_room(self, message: Any) -> bool:
+        # called with the lock held and a full queue
+        if self.overflow == "drop-oldest":
+            self._queue.popleft()
+            self.dropped += 1
+            return True
+        elif (
+            self.overflow == "drop-debug"
+            and message.record["level"].no < _DROP_DEBUG_BELOW
+        ):
+            return False
+        else:
+            self._cond.wait_for(
+                lambda: len(self._queue) < self.maxsize or self._stopped
+            )
+            return not self._stopped
+
+    def _run(self):
+        batch = self._get_batch()
+        while batch:
+            self._write_batch(batch)
+            batch = self._get_batch()
+
+    def _get_batch(self) -> list[Any]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or self._stopped)
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            self._writing = count
+            self._cond.notify_all()
+            return batch
+
+    def _write_batch(self, batch: list[Any]):
+        try:
+            self.stream.write("".join(self.formatter(m) for m in batch))
+            self.stream.flush()
+            written, dropped = len(batch), 0
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            written, dropped = 0, len(batch)
+
+        with self._cond:
+            self.written += written
+            self.dropped += dropped
+            self._writing = 0
+            self._cond.notify_all()
+
+
+# a key identifying identical records
+_RecordKey: TypeAlias = tuple[str, int, str]
+
+# the level, count and message of suppressed records
+_Summary: TypeAlias = tuple[str, int, str]
+
+
+class LogLimiter:
+    """:mod:`loguru` filter that deduplicates and samples records.
+
+    Identical records, with the same logger name, level and message, are only
+    passed once per ``window`` seconds. The number suppressed is logged in a
+    ``"N similar messages suppressed"`` summary record, with a ``suppressed``
+    extra field, when the window ends.
+
+    Records below ``sample_below`` are sampled at a rate set per logger name,
+    or for its closest parent in ``sample_rates``; a rate of ``0.1`` passes
+    every tenth record.
+
+    Attributes:
+        suppressed: The number of duplicate records suppressed.
+        sampled_out: The number of records not sampled.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: float = 10.0,
+        sample_rate: float = 1.0,
+        sample_rates: Optional[Mapping[str, float]] = None,
+        sample_below: int = 30,
+    ):
+        """Create a log limiter.
+
+        Args:
+            window: The number of seconds to suppress identical records for.
+            sample_rate: The default sample rate.
+            sample_rates: Sample rates by logger name.
+            sample_below: The level number below which records are sampled.
+        """
+        self.window = window
+        self.sample_rate = sample_rate
+        self.sample_rates = dict(sample_rates or {})
+        self.sample_below = sample_below
+        self.suppressed = 0
+        self.sampled_out = 0
+
+        self._seen: dict[_RecordKey, list[Any]] = {}
+        self._rates: dict[str, float] = {}
+        self._credits: dict[str, float] = {}
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, record: Mapping[str, Any]) -> bool:
+        if "suppressed" in record["extra"]:
+            return True
+
+        now = time.monotonic()
+        summaries: list[_Summary] = []
+        with self._lock:
+            passed = self._sample(record) and self._deduplicate(record, now, summaries)
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.window
+                self._sweep(now, summaries)
+
+        _log_summaries(summaries)
+        return passed
+
+    def flush(self):
+        """Log summaries of all suppressed records now."""
+        summaries: list[_Summary] = []
+        with self._lock:
+            self._sweep(float("inf"), summaries)
+        _log_summaries(summaries)
+
+    def _sample(self, record: Mapping[str, Any]) -> bool:
+        if record["level"].no >= self.sample_below:
+            return True
+
+        name = record["name"] or ""
+        rate = self._get_rate(name)
+        if rate >= 1:
+            return True
+
+        # each record adds the rate to the credit, a whole credit passes one
+        credit = self._credits.get(name, 1.0)
+        passed = credit >= 1
+        if passed:
+            credit -= 1
+        self._credits[name] = credit + rate
+
+        if not passed:
+            self.sampled_out += 1
+        return passed
+
+    def _get_rate(self, name: str) -> float:
+        rate = self._rates.get(name)
+        if rate is None:
+            rate = self.sample_rate
+            parts = name.split(".")
+            for i in range(len(parts), 0, -1):
+                parent = ".".join(parts[:i])
+                if parent in self.sample_rates:
+                    rate = self.sample_rates[parent]
+                    break
+            self._rates[name] = rate
+        return rate
+
+    def _deduplicate(
+        self, record: Mapping[str, Any], now: float, summaries: list[_Summary]
+    ) -> bool:
+        key = (record["name"] or "", record["level"].no, record["message"])
+        entry = self._seen.get(key)
+        if entry is not None and entry[0] > now:
+            entry[2] += 1
+            self.suppressed += 1
+            return False
+
+        if entry is not None and entry[2]:
+            summaries.append((entry[1], entry[2], key[2]))
+        self._seen[key] = [now + self.window, record["level"].name, 0]
+        return True
+
+    def _sweep(self, now: float, summaries: list[_Summary]):
+        # remove expired records, summarizing any that were suppressed
+        expired = [k for k, entry in self._seen.items() if entry[0] <= now]
+        for key in expired:
+            _, level, count = self._seen.pop(key)
+            if count:
+                summaries.append((level, count, key[2]))
+
+
+def _log_summaries(summaries: list[_Summary]):
+    for level, count, message in summaries:
+        logger.bind(suppressed=count).log(
+            level, "{} similar messages suppressed: {}", count, message
         )
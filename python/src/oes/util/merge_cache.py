@@ -0,0 +1,185 @@
+"""Merge cache module."""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable, Mapping, Set
+from typing import Any, Optional
+
+from oes.util.merge_dict import merge_dict
+
+# scalar types that can be content hashed
+_SCALAR_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+class MergeCache:
+    """Cache of :func:`merge_dict` results.
+
+    Results are keyed by a content hash of the inputs, or by a caller-supplied
+    key such as a pair of version tokens, and are evicted least recently used
+    first or when they expire. Results are frozen so they can be shared: mappings
+    are read-only, lists become tuples and sets become frozensets.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        """Create a merge cache.
+
+        Args:
+            maxsize: The maximum number of results to keep.
+            ttl: The number of seconds to keep a result, or ``None`` to keep it
+                until it is evicted.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[
+            Hashable, tuple[float, Mapping[Any, Any]]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def merge_dict(
+        self,
+        a: Mapping[Any, Any],
+        b: Mapping[Any, Any],
+        /,
+        *,
+        key: Optional[Hashable] = None,
+    ) -> Mapping[Any, Any]:
+        """Merge two mappings, returning a cached result if available.
+
+        Args:
+            a: The first mapping.
+            b: The second mapping, which will merge/overwrite keys in ``a``.
+            key: A key identifying the inputs. If not provided, a content hash
+                of ``a`` and ``b`` is used.
+
+        Returns:
+            The frozen result of :func:`merge_dict`.
+        """
+        if key is None:
+            key = content_hash(a) + content_hash(b)
+
+        result = self._get(key)
+        if result is None:
+            result = freeze(merge_dict(a, b, copy=False))
+            self._set(key, result)
+        return result
+
+    def clear(self):
+        """Remove all results."""
+        with self._lock:
+            self._results.clear()
+
+    def _get(self, key: Hashable) -> Optional[Mapping[Any, Any]]:
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires, result = entry
+            if expires < time.monotonic():
+                del self._results[key]
+                self.misses += 1
+                return None
+
+            self._results.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def _set(self, key: Hashable, result: Mapping[Any, Any]):
+        expires = float("inf") if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._results[key] = (expires, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+
+def content_hash(obj: object) -> bytes:
+    """Get a stable hash of the content of mappings, sequences and scalars.
+
+    Mappings and sets hash the same regardless of their order.
+
+    Raises:
+        TypeError: If the object contains an unsupported type.
+    """
+    h = hashlib.blake2b(digest_size=16)
+
+    if isinstance(obj, _SCALAR_TYPES):
+        h.update(type(obj).__name__.encode())
+        h.update(repr(obj).encode())
+    elif isinstance(obj, Mapping):
+        h.update(b"m")
+        digests = (content_hash(k) + content_hash(v) for k, v in obj.items())
+        _update_digests(h, digests, ordered=False)
+    elif isinstance(obj, (Set, frozenset)):
+        h.update(b"s")
+        _update_digests(h, (content_hash(v) for v in obj), ordered=False)
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"l")
+        _update_digests(h, (content_hash(v) for v in obj), ordered=True)
+    else:
+        raise TypeError(f"Cannot hash {type(obj).__name__!r}, provide a key")
+
+    return h.digest()
+
+
+def _update_digests(h: Any, digests: Iterable[bytes], ordered: bool):
+    # sort the digests of unordered collections so their order does not matter
+    for digest in digests if ordered else sorted(digests):
+        h.update(digest)
+
+
+def freeze(obj: Any) -> Any:
+    """Get an immutable version of nested mappings, lists and sets.
+
+    Mappings become :class:`FrozenDict` instances, lists become tuples and
+    sets become frozensets. Other values are not copied.
+    """
+    if isinstance(obj, Mapping):
+        return FrozenDict((k, freeze(v)) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    elif isinstance(obj, (Set, frozenset)):
+        return frozenset(obj)
+    else:
+        return obj
+
+
+class FrozenDict(dict):
+    """Read-only :obj:`dict`.
+
+    Being a :obj:`dict`, it can be serialized with :mod:`orjson` and merged
+    with :func:`merge_dict`. Copies return the same instance.
+    """
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> Any:
+        raise TypeError(f"{type(self).__name__!r} object is read-only")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __copy__(self) -> FrozenDict:
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> FrozenDict:
+        return self
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (type(self), (dict(self),))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict.__repr__(self)})"
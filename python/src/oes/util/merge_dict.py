@@ -1,38 +1,322 @@
 """Dict merge module."""
-import itertools
-from collections.abc import Mapping
+import functools
+from collections.abc import Callable, Iterator, Mapping, MutableMapping, Sequence
 from copy import deepcopy
-from typing import Any, TypeVar
+from typing import Any, Literal, Optional, TypeVar, Union
+
+from typing_extensions import TypeAlias
 
 _K = TypeVar("_K")
 
+MergeStrategy: TypeAlias = Union[
+    Literal["replace", "append", "union"], Callable[[Any, Any], Any]
+]
+MergePath: TypeAlias = tuple[Any, ...]
+
+_missing = object()
+
+# types that are never copied
+_IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None))
 
-def merge_dict(a: Mapping[_K, Any], b: Mapping[_K, Any], /) -> dict[_K, Any]:
+
+def merge_dict(
+    a: Mapping[_K, Any], b: Mapping[_K, Any], /, *, copy: bool = True
+) -> dict[_K, Any]:
     """Recursively merge two mappings into a :obj:`dict`.
 
+    Nested mappings are merged iteratively, so the depth of the mappings is not
+    limited by the recursion limit.
+
     Args:
         a: The first mapping.
         b: The second mapping, which will merge/overwrite keys in ``a``.
+        copy: Whether to deep copy the values. If ``False``, values that are not
+            merged are shared with ``a`` and ``b``, and only the dicts for
+            nested mappings present in both are new.
+
+    Returns:
+        ``a`` and ``b`` merged together.
+    """
+    result: dict[_K, Any] = {}
+    stack: list[_MergeItem] = [(result, a, b)]
+
+    copy_func = deepcopy if copy else _no_copy
+
+    while stack:
+        _merge_level(*stack.pop(), copy_func, stack)
+
+    return result
+
+
+_MergeItem = tuple[dict[Any, Any], Mapping[Any, Any], Mapping[Any, Any]]
+
+
+def _merge_level(
+    dest: dict[Any, Any],
+    a: Mapping[Any, Any],
+    b: Mapping[Any, Any],
+    copy_func: Callable[[Any], Any],
+    stack: list[_MergeItem],
+):
+    # copy all unchanged items
+    dest.update((k, copy_func(v)) for k, v in a.items() if k not in b)
+
+    # copy or merge all added/updated items
+    for k, v in b.items():
+        a_v = a.get(k, _missing)
+        if isinstance(a_v, Mapping) and isinstance(v, Mapping):
+            merged: dict[Any, Any] = {}
+            dest[k] = merged
+            stack.append((merged, a_v, v))
+        else:
+            dest[k] = copy_func(v)
+
+
+def _no_copy(value: Any) -> Any:
+    return value
+
+
+def merge_dicts(
+    *layers: Mapping[Any, Any],
+    strategies: Optional[Mapping[MergePath, MergeStrategy]] = None,
+    copy: bool = True,
+) -> dict[Any, Any]:
+    """Merge any number of mappings into a :obj:`dict` in one pass.
+
+    The result is the same as merging the layers pairwise with
+    :func:`merge_dict`, but each value is only copied once.
+
+    Values at a path with a strategy are combined with it, left to right:
+
+    - ``"replace"``: use the last value
+    - ``"append"``: concatenate lists
+    - ``"union"``: combine into a :obj:`set`
+    - a callable taking the combined value so far and the next value
+
+    Args:
+        layers: The mappings, each merging/overwriting keys in the previous ones.
+        strategies: Merge strategies by path, a tuple of keys.
+        copy: Whether to deep copy the values. If ``False``, values that are not
+            merged are shared with the layers.
 
     Returns:
-        A deep copy of ``a`` and ``b`` merged together.
+        The layers merged together.
+    """
+    result: dict[Any, Any] = {}
+    stack: list[_LayersItem] = [(result, layers, ())]
+    copy_func = deepcopy if copy else _no_copy
+
+    while stack:
+        _merge_layers(*stack.pop(), strategies or {}, copy_func, stack)
+
+    return result
+
+
+_LayersItem = tuple[dict[Any, Any], Sequence[Mapping[Any, Any]], MergePath]
+
+
+def _merge_layers(
+    dest: dict[Any, Any],
+    layers: Sequence[Mapping[Any, Any]],
+    path: MergePath,
+    strategies: Mapping[MergePath, MergeStrategy],
+    copy_func: Callable[[Any], Any],
+    stack: list[_LayersItem],
+):
+    for k, vs in _collect_values(layers).items():
+        # only track paths when they are needed
+        sub_path = path + (k,) if strategies else path
+        strategy = strategies.get(sub_path)
+        if strategy is not None:
+            dest[k] = copy_func(_apply_strategy(strategy, vs))
+        else:
+            _merge_values(dest, k, vs, sub_path, copy_func, stack)
+
+
+def _merge_values(
+    dest: dict[Any, Any],
+    key: Any,
+    values: list[Any],
+    path: MergePath,
+    copy_func: Callable[[Any], Any],
+    stack: list[_LayersItem],
+):
+    mappings = _get_trailing_mappings(values)
+    if len(mappings) > 1:
+        merged: dict[Any, Any] = {}
+        dest[key] = merged
+        stack.append((merged, mappings, path))
+    else:
+        dest[key] = copy_func(values[-1])
+
+
+def _collect_values(layers: Sequence[Mapping[Any, Any]]) -> dict[Any, list[Any]]:
+    values: dict[Any, list[Any]] = {}
+    for layer in layers:
+        for k, v in layer.items():
+            values.setdefault(k, []).append(v)
+    return values
+
+
+def _apply_strategy(strategy: MergeStrategy, values: list[Any]) -> Any:
+    if isinstance(strategy, str):
+        # start from an empty value, so a single value is normalized too
+        func, initial = _strategies[strategy]
+        return functools.reduce(func, values, initial())
+    else:
+        return functools.reduce(strategy, values)
+
+
+def _get_trailing_mappings(values: list[Any]) -> list[Mapping[Any, Any]]:
+    # a value that is not a mapping replaces everything before it
+    i = len(values)
+    while i > 0 and isinstance(values[i - 1], Mapping):
+        i -= 1
+    return values[i:]
+
+
+def _replace(a: Any, b: Any) -> Any:
+    return b
+
+
+def _append(a: Any, b: Any) -> Any:
+    return [*a, *b]
+
+
+def _union(a: Any, b: Any) -> Any:
+    return {*a, *b}
+
+
+_strategies: dict[str, tuple[Callable[[Any, Any], Any], Callable[[], Any]]] = {
+    "replace": (_replace, type(None)),
+    "append": (_append, list),
+    "union": (_union, set),
+}
+
+
+class MergedView(Mapping[_K, Any]):
+    """Read-only view of two mappings merged together.
+
+    Nothing is copied. Nested mappings present in both mappings are returned as
+    :class:`MergedView` instances, created when they are first accessed.
+    """
+
+    def __init__(self, a: Mapping[_K, Any], b: Mapping[_K, Any], /):
+        """Create a merged view.
+
+        Args:
+            a: The first mapping.
+            b: The second mapping, which will merge/overwrite keys in ``a``.
+        """
+        self._a = a
+        self._b = b
+        self._views: dict[_K, MergedView] = {}
+
+    def __getitem__(self, key: _K) -> Any:
+        view = self._views.get(key)
+        if view is not None:
+            return view
+
+        b_v = self._b.get(key, _missing)
+        if b_v is _missing:
+            return self._a[key]
+
+        a_v = self._a.get(key, _missing)
+        if isinstance(a_v, Mapping) and isinstance(b_v, Mapping):
+            view = MergedView(a_v, b_v)
+            self._views[key] = view
+            return view
+
+        return b_v
+
+    def __iter__(self) -> Iterator[_K]:
+        yield from self._b
+        yield from (k for k in self._a if k not in self._b)
+
+    def __len__(self) -> int:
+        return len(self._b) + sum(1 for k in self._a if k not in self._b)
+
+    def __repr__(self) -> str:
+        return f"MergedView({self._a!r}, {self._b!r})"
+
+
+class CopyOnWriteDict(MutableMapping[_K, Any]):
+    """Mutable mapping over a shared mapping that copies only what is changed.
+
+    Writes are stored in this mapping without modifying the underlying mapping.
+    Nested mappings are returned as :class:`CopyOnWriteDict` instances, and
+    other mutable values are deep copied when they are first accessed.
     """
-    unchanged = a.keys() - b.keys()
-    added = b.keys() - a.keys()
-    updated = b.keys() - added
-
-    return dict(
-        itertools.chain(
-            # copy all unchanged items
-            ((k, deepcopy(a[k])) for k in unchanged),
-            # copy all added items
-            ((k, deepcopy(b[k])) for k in added),
-            # copy or merge all updated items
-            (
-                (k, merge_dict(a[k], b[k]))
-                if isinstance(a[k], Mapping) and isinstance(b[k], Mapping)
-                else (k, deepcopy(b[k]))
-                for k in updated
-            ),
-        )
-    )
+
+    def __init__(self, base: Mapping[_K, Any], /):
+        """Create a copy-on-write dict.
+
+        Args:
+            base: The underlying mapping, which is not modified.
+        """
+        self._base = base
+        self._local: dict[_K, Any] = {}
+        self._deleted: set[_K] = set()
+
+    def __getitem__(self, key: _K) -> Any:
+        value = self._local.get(key, _missing)
+        if value is not _missing:
+            return value
+        elif key in self._deleted:
+            raise KeyError(key)
+
+        value = self._base[key]
+        if isinstance(value, _IMMUTABLE_TYPES):
+            return value
+
+        value = _wrap_or_copy(value)
+        self._local[key] = value
+        return value
+
+    def __setitem__(self, key: _K, value: Any):
+        self._local[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key: _K):
+        if key not in self:
+            raise KeyError(key)
+        self._local.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._local or (key not in self._deleted and key in self._base)
+
+    def __iter__(self) -> Iterator[_K]:
+        yield from (k for k in self._base if k not in self._deleted)
+        yield from (k for k in self._local if k not in self._base)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"CopyOnWriteDict({dict(self)!r})"
+
+    def to_dict(self) -> dict[_K, Any]:
+        """Get a plain :obj:`dict` of this mapping, including nested mappings."""
+        result: dict[_K, Any] = {}
+        stack: list[tuple[dict[Any, Any], Mapping[Any, Any]]] = [(result, self)]
+
+        while stack:
+            dest, src = stack.pop()
+            for k, v in src.items():
+                if isinstance(v, Mapping):
+                    nested: dict[Any, Any] = {}
+                    dest[k] = nested
+                    stack.append((nested, v))
+                else:
+                    dest[k] = v
+
+        return result
+
+
+def _wrap_or_copy(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return CopyOnWriteDict(value)
+    else:
+        return deepcopy(value)
@@ -0,0 +1,238 @@
+"""Tracing module."""
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from contextvars import ContextVar
+from typing import IO, Any, Optional, TypeVar, Union
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+SpanSink = Callable[["Span"], None]
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("_current_span", default=None)
+_sink: Optional[SpanSink] = None
+
+
+class Span:
+    """A timed operation within a trace.
+
+    Attributes:
+        name: The span name.
+        trace_id: The ID of the trace, shared by the root span and its children.
+        span_id: The ID of the span.
+        parent_id: The ID of the parent span, or ``None`` for the root span.
+        start: The start time, as a UNIX timestamp.
+        duration: The duration in seconds, once the span has ended.
+        attributes: Attributes of the span.
+        error: The name of the exception the span ended with, if any.
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start",
+        "duration",
+        "attributes",
+        "error",
+        "_start_counter",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional[Span] = None,
+        attributes: Optional[dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id: str = parent.trace_id if parent is not None else _make_id(128)
+        self.span_id: str = _make_id(64)
+        self.parent_id: Optional[str] = parent.span_id if parent is not None else None
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.attributes = attributes if attributes is not None else {}
+        self.error: Optional[str] = None
+        self._start_counter = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any):
+        """Set an attribute."""
+        self.attributes[key] = value
+
+    def end(self):
+        """End the span."""
+        self.duration = time.perf_counter() - self._start_counter
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get a JSON-serializable :obj:`dict` of the span."""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def __repr__(self) -> str:
+        return f"<Span {self.name} {self.span_id}>"
+
+
+def _make_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable[[_F], _F]:
+    """Decorate a function or coroutine function to run it in a span.
+
+    Args:
+        name: The span name, the function's qualified name by default.
+        attributes: Attributes of the span.
+    """
+
+    def decorator(func: _F) -> _F:
+        span_name = func.__qualname__ if name is None else name
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name, **attributes):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+def span(name: str, **attributes: Any) -> _SpanContext:
+    """Get a context manager for a span, a child of the current span.
+
+    If no sink is set, the span is not recorded and the context manager
+    yields ``None``.
+
+    Args:
+        name: The span name.
+        attributes: Attributes of the span.
+    """
+    if _sink is None:
+        return _null_span
+    return _SpanContext(name, attributes)
+
+
+class _SpanContext:
+    __slots__ = ("name", "attributes", "span", "token")
+
+    def __init__(self, name: str, attributes: dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        self.span = Span(self.name, _current_span.get(), self.attributes)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: Optional[type], *exc: object):
+        self.span.end()
+        if exc_type is not None:
+            self.span.error = exc_type.__name__
+        _current_span.reset(self.token)
+
+        sink = _sink
+        if sink is not None:
+            sink(self.span)
+
+
+class _NullSpanContext:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: object):
+        pass
+
+
+_null_span: Any = _NullSpanContext()
+
+
+def current_span() -> Optional[Span]:
+    """Get the current span."""
+    return _current_span.get()
+
+
+def set_sink(sink: Optional[SpanSink]):
+    """Set the sink ended spans are sent to, or ``None`` to stop tracing."""
+    global _sink
+    _sink = sink
+
+
+class RingBufferSink:
+    """Span sink keeping the most recent spans in memory."""
+
+    def __init__(self, maxsize: int = 10000):
+        """Create a ring buffer sink.
+
+        Args:
+            maxsize: The maximum number of spans to keep.
+        """
+        self.spans: deque[Span] = deque(maxlen=maxsize)
+
+    def __call__(self, span: Span):
+        self.spans.append(span)
+
+    def get_trace(self, trace_id: str) -> list[Span]:
+        """Get the kept spans of a trace, in order of their start time."""
+        spans = [s for s in list(self.spans) if s.trace_id == trace_id]
+        return sorted(spans, key=lambda s: s.start)
+
+
+class JSONLinesSink:
+    """Span sink writing each span as a line of JSON.
+
+    The lines can be read back with :func:`read_spans`.
+    """
+
+    def __init__(self, file: Union[str, IO[str]]):
+        """Create a JSON lines sink.
+
+        Args:
+            file: A path to append to, or a text stream.
+        """
+        self._owned = isinstance(file, str)
+        self._file = open(file, "a") if isinstance(file, str) else file  # noqa: SIM115
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        """Close the file, if it was opened by this sink."""
+        if self._owned:
+            self._file.close()
+
+
+def read_spans(lines: Iterable[str]) -> Iterator[dict[str, Any]]:
+    """Read spans written by :class:`JSONLinesSink`, as :obj:`dict` objects."""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
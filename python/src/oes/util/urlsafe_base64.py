@@ -1,13 +1,93 @@
 """URL safe base64 encoding."""
-import base64
+import binascii
+from collections.abc import Iterable
 from typing import Union
 
+_BytesLike = Union[bytes, bytearray, memoryview]
 
-def urlsafe_b64encode(data: Union[bytes, bytearray, memoryview]) -> str:
+_TO_URLSAFE = bytes.maketrans(b"+/", b"-_")
+_FROM_URLSAFE = bytes.maketrans(b"-_", b"+/")
+_PADDING = (b"", b"===", b"==", b"=")
+_PAD_CHAR = ord("=")
+
+# a multiple of 4, so only the last chunk needs padding
+_DECODE_CHUNK = 65536
+
+
+def urlsafe_b64encode(data: _BytesLike) -> str:
     """URL-safe base64 encode the data, stripping padding."""
-    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+    return urlsafe_b64encode_bytes(data).decode()
 
 
 def urlsafe_b64decode(data: str) -> bytes:
     """URL-safe base64 decode the string without throwing padding errors."""
-    return base64.urlsafe_b64decode(data + "==")
+    return urlsafe_b64decode_bytes(data.encode("ascii"))
+
+
+def urlsafe_b64decode_into(
+    data: Union[str, _BytesLike], buffer: Union[bytearray, memoryview]
+) -> int:
+    """URL-safe base64 decode data into a buffer.
+
+    The data is decoded in chunks, so only a chunk of decoded bytes is held
+    in memory at a time, not a copy of the whole result.
+
+    Args:
+        data: The encoded data, with or without padding.
+        buffer: A writable buffer at least as long as the decoded data.
+
+    Returns:
+        The number of bytes written.
+
+    Raises:
+        ValueError: If the buffer is too small.
+    """
+    view = memoryview(data.encode("ascii") if isinstance(data, str) else data)
+    end = len(view)
+    while end and view[end - 1] == _PAD_CHAR:
+        end -= 1
+    size = end * 3 // 4
+    if size > len(buffer):
+        raise ValueError(f"Buffer too small, need {size} bytes")
+
+    out = memoryview(buffer)
+    pos = 0
+    for start in range(0, end, _DECODE_CHUNK):
+        chunk = bytes(view[start : min(start + _DECODE_CHUNK, end)])
+        decoded = binascii.a2b_base64(
+            chunk.translate(_FROM_URLSAFE) + _PADDING[len(chunk) % 4]
+        )
+        out[pos : pos + len(decoded)] = decoded
+        pos += len(decoded)
+    return pos
+
+
+def urlsafe_b64encode_bytes(data: _BytesLike) -> bytes:
+    """URL-safe base64 encode the data to :obj:`bytes`, stripping padding."""
+    # translate the alphabet and delete the padding in one pass
+    return binascii.b2a_base64(data, newline=False).translate(_TO_URLSAFE, b"=")
+
+
+def urlsafe_b64decode_bytes(data: _BytesLike) -> bytes:
+    """URL-safe base64 decode :obj:`bytes` with or without padding."""
+    translated = bytes(data).translate(_FROM_URLSAFE, b"=")
+    return binascii.a2b_base64(translated + _PADDING[len(translated) % 4])
+
+
+def urlsafe_b64encode_many(items: Iterable[_BytesLike]) -> list[str]:
+    """URL-safe base64 encode each item, stripping padding."""
+    b2a = binascii.b2a_base64
+    table = _TO_URLSAFE
+    return [b2a(item, newline=False).translate(table, b"=").decode() for item in items]
+
+
+def urlsafe_b64decode_many(items: Iterable[str]) -> list[bytes]:
+    """URL-safe base64 decode each string without throwing padding errors."""
+    a2b = binascii.a2b_base64
+    table = _FROM_URLSAFE
+    padding = _PADDING
+    result = []
+    for item in items:
+        translated = item.encode("ascii").translate(table, b"=")
+        result.append(a2b(translated + padding[len(translated) % 4]))
+    return result
@@ -1,17 +1,30 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Optional, Union
 
 import pytest
 from attrs import frozen
-from blacksheep import Application, Response
+from blacksheep import Application, Content, HTTPException, Request, Response
+from blacksheep.server.bindings import InvalidRequestBody
 from blacksheep.server.openapi.common import ContentInfo, ResponseInfo
 from blacksheep.server.openapi.v3 import FieldInfo, OpenAPIHandler
+from blacksheep.testing import TestClient
 from cattrs.preconf.orjson import make_converter
-from oes.util import is_attrs_instance
-from oes.util.blacksheep import JSONResponseFunc
+from oes.util import ExceptionDetails, is_attrs_instance
+from oes.util.blacksheep import (
+    JSONResponseFunc,
+    PayloadTooLarge,
+    UnprocessableEntity,
+    configure_unprocessable_entity,
+)
 from oes.util.blacksheep.attrs_handler import (
+    AttrsBinder,
+    AttrsListBinder,
     AttrsTypeHandler,
     FromAttrs,
+    FromAttrsList,
     _get_field_type,
+    get_structure_hook,
 )
 from openapidocs.v3 import Info, Reference, Schema, ValueFormat, ValueType
 
@@ -65,6 +78,13 @@ class MyClass4:
     val3: dict[str, int]
 
 
+@frozen
+class MyClass5:
+    a: MyClass2
+    b: Optional[MyClass2]
+    c: list[MyClass2]
+
+
 my_class_1_schema = Schema(
     type=ValueType.OBJECT,
     nullable=False,
@@ -181,6 +201,18 @@ def docs():
     return docs_obj
 
 
+@pytest.fixture
+def ref_docs():
+    docs_obj = OpenAPIHandler(
+        info=Info(
+            title="Test",
+            version="0.1.0",
+        )
+    )
+    docs_obj.object_types_handlers.append(AttrsTypeHandler(docs_obj, use_refs=True))
+    return docs_obj
+
+
 @pytest.mark.parametrize(
     "typ, expected",
     (
@@ -230,3 +262,164 @@ def test_attrs_handler(docs: OpenAPIHandler):
             ),
         ),
     ]
+
+
+def test_attrs_handler_refs(ref_docs: OpenAPIHandler):
+    ref = ref_docs.get_schema_by_type(MyClass5)
+    assert isinstance(ref, Reference)
+
+    my_class_2_ref = Reference("#/components/schemas/MyClass2")
+    assert ref_docs.get_fields(MyClass5) == [
+        FieldInfo("a", MyClass2),
+        FieldInfo("b", Schema(all_of=[my_class_2_ref], nullable=True)),
+        FieldInfo(
+            "c",
+            Schema(type=ValueType.ARRAY, items=my_class_2_ref, nullable=False),
+        ),
+    ]
+    assert ref_docs.components.schemas["MyClass2"] == my_class_2_schema
+    assert ref_docs.get_schema_by_type(MyClass2) == my_class_2_ref
+
+
+def test_attrs_handler_cache(docs: OpenAPIHandler):
+    assert docs.get_fields(MyClass4) is not docs.get_fields(MyClass4)
+    assert docs.get_fields(MyClass4)[0].type is docs.get_fields(MyClass4)[0].type
+
+
+def test_attrs_binder_parse_value():
+    binder = AttrsBinder(MyClass1)
+    assert binder.parse_value({"a": 1}) == MyClass1(1)
+
+    with pytest.raises(HTTPException) as exc_info:
+        binder.parse_value({"b": "x"})
+
+    assert exc_info.value.status == 422
+
+
+def test_attrs_binder_warm_up():
+    AttrsBinder.warm_up(MyClass2, list[MyClass2])
+    hook = get_structure_hook(AttrsBinder.cattrs_converter, MyClass2)
+    assert get_structure_hook(AttrsBinder.cattrs_converter, MyClass2) is hook
+    assert AttrsBinder(MyClass2)._structure_hook is hook
+
+
+def test_attrs_binder_max_body_size(monkeypatch):
+    monkeypatch.setattr(AttrsBinder, "max_body_size", 8)
+    binder = AttrsBinder(MyClass1)
+
+    request = Request("POST", b"/", [])
+    request.content = Content(b"application/json", b'{"a": 1}')
+    assert asyncio.run(binder.read_data(request)) == {"a": 1}
+
+    request = Request("POST", b"/", [])
+    request.content = Content(b"application/json", b'{"a": 10}')
+    with pytest.raises(PayloadTooLarge):
+        asyncio.run(binder.read_data(request))
+
+
+def _make_body_request(content_type, body):
+    request = Request("POST", b"/", [(b"content-type", content_type)])
+    request.content = Content(content_type, body)
+    return request
+
+
+@pytest.mark.parametrize(
+    "content_type, body",
+    (
+        (b"application/json", b'[{"a": 1}, {"a": 2, "b": "x"}]'),
+        (b"application/x-ndjson", b'{"a": 1}\n\n{"a": 2, "b": "x"}\n'),
+    ),
+)
+def test_attrs_list_binder(content_type, body):
+    binder = AttrsListBinder(MyClass1)
+    binder.batch_size = 1
+    request = _make_body_request(content_type, body)
+    assert asyncio.run(binder.get_value(request)) == [MyClass1(1), MyClass1(2, "x")]
+
+
+@pytest.mark.parametrize(
+    "content_type, body",
+    (
+        (b"application/json", b'[{"a": 1}, {}, {"a": 2}, {"b": "x"}]'),
+        (b"application/x-ndjson", b'{"a": 1}\n{}\n{"a": 2}\n{"b": "x"}'),
+    ),
+)
+def test_attrs_list_binder_errors(content_type, body):
+    binder = AttrsListBinder(MyClass1)
+    request = _make_body_request(content_type, body)
+
+    with pytest.raises(UnprocessableEntity) as exc_info:
+        asyncio.run(binder.get_value(request))
+
+    assert exc_info.value.details == [
+        ExceptionDetails((1,), "A value is required for 'a'"),
+        ExceptionDetails((3,), "A value is required for 'a'"),
+    ]
+
+
+def test_attrs_list_binder_error_response():
+    app = Application()
+    configure_unprocessable_entity(app)
+
+    @app.router.post("/items")
+    async def post_items(items: FromAttrsList[MyClass1]):
+        return Response(204)
+
+    async def run():
+        await app.start()
+        client = TestClient(app)
+        response = await client.post(
+            "/items",
+            content=Content(b"application/json", b'[{"a": 1}, {}]'),
+        )
+        return response.status, await response.json()
+
+    assert asyncio.run(run()) == (
+        422,
+        {
+            "message": "Invalid request body",
+            "errors": [{"path": [1], "message": "A value is required for 'a'"}],
+        },
+    )
+
+
+def test_attrs_list_binder_max_errors():
+    binder = AttrsListBinder(MyClass1)
+    binder.max_errors = 1
+    request = _make_body_request(b"application/x-ndjson", b"{}\nnot json\n{}")
+
+    with pytest.raises(UnprocessableEntity) as exc_info:
+        asyncio.run(binder.get_value(request))
+
+    assert exc_info.value.details == [
+        ExceptionDetails((0,), "A value is required for 'a'"),
+    ]
+
+
+def test_attrs_list_binder_not_array():
+    binder = AttrsListBinder(MyClass1)
+    request = _make_body_request(b"application/json", b'{"a": 1}')
+
+    with pytest.raises(InvalidRequestBody):
+        asyncio.run(binder.get_value(request))
+
+
+@pytest.mark.parametrize("executor_type", (ThreadPoolExecutor, ProcessPoolExecutor))
+def test_attrs_binder_executor(monkeypatch, executor_type):
+    with executor_type(1) as executor:
+        monkeypatch.setattr(AttrsBinder, "executor", executor)
+        monkeypatch.setattr(AttrsBinder, "offload_threshold", 10)
+        binder = AttrsBinder(MyClass1)
+
+        for body in (b'{"a": 1}', b'{"a": 1, "b": "offloaded"}'):
+            request = _make_body_request(b"application/json", body)
+            assert asyncio.run(binder.get_value(request)).a == 1
+
+        request = _make_body_request(b"application/json", b'{"b": "offloaded"}')
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(binder.get_value(request))
+        assert exc_info.value.status == 422
+
+        request = _make_body_request(b"application/json", b'{"a": 1, "b": "inval')
+        with pytest.raises(InvalidRequestBody):
+            asyncio.run(binder.get_value(request))
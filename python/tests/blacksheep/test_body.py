@@ -0,0 +1,127 @@
+import asyncio
+import tracemalloc
+
+import pytest
+from blacksheep import Content, Request, StreamedContent
+from blacksheep.contents import ASGIContent
+from blacksheep.server.bindings import InvalidRequestBody
+from oes.util.blacksheep import PayloadTooLarge, iter_lines, read_body
+
+
+def _make_request(chunks, content_length=None):
+    headers = []
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+
+    async def gen():
+        for chunk in chunks:
+            yield chunk
+
+    request = Request("POST", b"/", headers)
+    request.content = StreamedContent(b"application/json", gen)
+    return request
+
+
+@pytest.mark.parametrize("content_length", (None, 9))
+def test_read_body(content_length):
+    request = _make_request([b"[1, ", b"2, 3]"], content_length)
+    body = asyncio.run(read_body(request, 100))
+    assert body == b"[1, 2, 3]"
+
+
+@pytest.mark.parametrize("max_size", (None, 100))
+def test_read_body_read_again(max_size):
+    messages = [
+        {"type": "http.request", "body": b"[1, ", "more_body": True},
+        {"type": "http.request", "body": b"2, 3]", "more_body": False},
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    request = Request(
+        "POST",
+        b"/",
+        [(b"content-type", b"application/json"), (b"content-length", b"9")],
+    )
+    request.content = ASGIContent(receive)
+
+    async def run():
+        assert await read_body(request, max_size) == b"[1, 2, 3]"
+        assert await request.read() == b"[1, 2, 3]"
+        assert await request.json() == [1, 2, 3]
+        assert await read_body(request, max_size) == b"[1, 2, 3]"
+
+    asyncio.run(run())
+
+
+def test_read_body_already_read():
+    request = Request("POST", b"/", [])
+    request.content = Content(b"application/json", b"{}")
+    assert asyncio.run(read_body(request)) == b"{}"
+
+    with pytest.raises(PayloadTooLarge):
+        asyncio.run(read_body(request, 1))
+
+
+def test_read_body_no_content():
+    request = Request("POST", b"/", [])
+    assert asyncio.run(read_body(request)) is None
+
+
+@pytest.mark.parametrize("content_length", (None, 9))
+def test_read_body_too_large(content_length):
+    request = _make_request([b"[1, ", b"2, 3]"], content_length)
+    with pytest.raises(PayloadTooLarge):
+        asyncio.run(read_body(request, 8))
+
+
+@pytest.mark.parametrize("content_length", (5, 20, "x"))
+@pytest.mark.parametrize("max_size", (None, 100))
+def test_read_body_length_mismatch(content_length, max_size):
+    request = _make_request([b"[1, ", b"2, 3]"], content_length)
+    with pytest.raises(InvalidRequestBody):
+        asyncio.run(read_body(request, max_size))
+
+
+def test_read_body_no_preallocation_without_limit():
+    request = _make_request([b"{}"], 500000000)
+    tracemalloc.start()
+    try:
+        with pytest.raises(InvalidRequestBody):
+            asyncio.run(read_body(request))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 10000000
+
+
+@pytest.mark.parametrize("content_length", (None, 11))
+def test_iter_lines(content_length):
+    request = _make_request([b"a\nb", b"c\n", b"\nd"], content_length)
+
+    async def collect():
+        return [line async for line in iter_lines(request, 100)]
+
+    assert asyncio.run(collect()) == [b"a", b"bc", b"", b"d"]
+
+
+def test_iter_lines_long_line():
+    line = b"x" * 100000
+    chunks = [line[i : i + 1000] for i in range(0, len(line), 1000)]
+    request = _make_request([*chunks, b"\ny\n", b"z"])
+
+    async def collect():
+        return [line async for line in iter_lines(request)]
+
+    assert asyncio.run(collect()) == [line, b"y", b"z"]
+
+
+def test_iter_lines_too_large():
+    request = _make_request([b"a\nb", b"c\n", b"\nd"])
+
+    async def collect():
+        return [line async for line in iter_lines(request, 5)]
+
+    with pytest.raises(PayloadTooLarge):
+        asyncio.run(collect())
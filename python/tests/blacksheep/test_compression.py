@@ -0,0 +1,38 @@
+import gzip
+
+import pytest
+from oes.util.blacksheep.compression import ENCODINGS, compress, negotiate_encoding
+
+
+@pytest.mark.parametrize(
+    "header, encodings, expected",
+    (
+        (None, ("br", "gzip"), None),
+        (b"", ("br", "gzip"), None),
+        (b"gzip", ("br", "gzip"), "gzip"),
+        (b"gzip, br", ("br", "gzip"), "br"),
+        (b"gzip;q=1.0, br;q=0.5", ("br", "gzip"), "gzip"),
+        (b"br;q=0, *", ("br", "gzip"), "gzip"),
+        (b"*;q=0", ("br", "gzip"), None),
+        (b"deflate", ("br", "gzip"), None),
+        (b"GZIP;q=x, br", ("gzip",), None),
+    ),
+)
+def test_negotiate_encoding(header, encodings, expected):
+    assert negotiate_encoding(header, encodings) == expected
+
+
+def test_compress():
+    data = b"example" * 100
+    assert gzip.decompress(compress(data, "gzip")) == data
+
+    with pytest.raises(ValueError):
+        compress(data, "deflate")
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_compress_encodings(encoding):
+    data = b"example" * 100
+    compressed = compress(data, encoding)
+    assert len(compressed) < len(data)
+    assert compress(data, encoding, 1) != data
@@ -1,12 +1,19 @@
+import asyncio
+import gzip
 from unittest.mock import MagicMock
 
+import orjson
+from blacksheep import Application, Response
 from blacksheep.server.openapi.common import (
     ContentInfo,
     ParameterInfo,
     RequestBodyInfo,
     ResponseInfo,
 )
+from blacksheep.server.openapi.v3 import OpenAPIHandler
+from blacksheep.testing import TestClient
 from oes.util.blacksheep.docs import DocsHelper
+from openapidocs.v3 import Info
 
 
 class MyResponse:
@@ -59,3 +66,37 @@ def test_docs_helper():
         deprecated=False,
         on_created=None,
     )
+
+
+def test_docs_helper_cached_json():
+    app = Application()
+    openapi = OpenAPIHandler(info=Info(title="Test", version="0.1.0"))
+    openapi.bind_app(app)
+    docs = DocsHelper(openapi)
+    docs.use_cached_json(app)
+
+    @docs(summary="Summary", response_type=MyResponse)
+    @app.router.get("/")
+    def func() -> Response:
+        return Response(204)
+
+    async def run():
+        await app.start()
+        client = TestClient(app)
+
+        response = await client.get(
+            "/openapi.json", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status == 200
+        assert response.get_first_header(b"content-encoding") == b"gzip"
+        body = orjson.loads(gzip.decompress(await response.read()))
+        assert body["info"] == {"title": "Test", "version": "0.1.0"}
+        assert body["paths"]["/"]["get"]["summary"] == "Summary"
+
+        etag = response.get_first_header(b"etag")
+        response = await client.get(
+            "/openapi.json", headers={"If-None-Match": etag.decode()}
+        )
+        assert response.status == 304
+
+    asyncio.run(run())
@@ -0,0 +1,48 @@
+from oes.util.blacksheep.metrics import MetricsRegistry, get_type_name
+
+
+def test_histogram():
+    registry = MetricsRegistry(enabled=True)
+    histogram = registry.histogram(
+        "test_seconds", "Test.", labels=("name",), buckets=(0.1, 1.0)
+    )
+    assert registry.histogram("test_seconds", "Test.") is histogram
+
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5.0, "a")
+    histogram.observe(1.0, 'b"\n')
+
+    assert registry.render().decode().splitlines() == [
+        "# HELP test_seconds Test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{name="a",le="0.1"} 1',
+        'test_seconds_bucket{name="a",le="1.0"} 2',
+        'test_seconds_bucket{name="a",le="+Inf"} 3',
+        'test_seconds_sum{name="a"} 5.55',
+        'test_seconds_count{name="a"} 3',
+        'test_seconds_bucket{name="b\\"\\n",le="0.1"} 0',
+        'test_seconds_bucket{name="b\\"\\n",le="1.0"} 1',
+        'test_seconds_bucket{name="b\\"\\n",le="+Inf"} 1',
+        'test_seconds_sum{name="b\\"\\n"} 1.0',
+        'test_seconds_count{name="b\\"\\n"} 1',
+    ]
+
+
+def test_histogram_time():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Test.")
+
+    with histogram.time():
+        pass
+    assert "test_seconds_count" not in registry.render().decode()
+
+    registry.enabled = True
+    with histogram.time():
+        pass
+    assert "test_seconds_count 1" in registry.render().decode()
+
+
+def test_get_type_name():
+    assert get_type_name(int) == "int"
+    assert get_type_name(list[int]) == "list[int]"
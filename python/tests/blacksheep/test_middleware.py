@@ -0,0 +1,590 @@
+import asyncio
+import gzip
+import importlib.util
+import re
+from concurrent.futures import ThreadPoolExecutor
+from ipaddress import ip_address, ip_network
+
+import pytest
+from attrs import frozen
+from blacksheep import Application, Content, Request, Response
+from blacksheep.exceptions import NotFound
+from blacksheep.testing import TestClient
+from loguru import logger
+from oes.util.blacksheep.attrs_handler import FromAttrs
+from oes.util.blacksheep.metrics import registry
+from oes.util.blacksheep.middleware import (
+    _NetworkIndex,
+    configure_compression,
+    configure_cors,
+    configure_etags,
+    configure_forwarded_headers,
+    configure_log_context,
+    configure_metrics,
+    configure_tracing,
+)
+from oes.util.blacksheep.response import (
+    CachedContent,
+    JSONResponseFunc,
+    make_encoded_etag,
+    make_etag,
+)
+from oes.util.logging import InterceptHandler
+from oes.util.tracing import RingBufferSink, set_sink
+
+_body = b'{"example":"' + b"x" * 2000 + b'"}'
+
+
+def _request(app, method, path, headers=None):
+    async def run():
+        await app.start()
+        client = TestClient(app)
+        response = await getattr(client, method)(path, headers=headers)
+        return response, await response.read()
+
+    return asyncio.run(run())
+
+
+def _make_app(**kwargs):
+    app = Application()
+    configure_compression(app, **kwargs)
+
+    @app.router.get("/json")
+    async def get_json():
+        return Response(200, None, Content(b"application/json", _body))
+
+    @app.router.get("/text")
+    async def get_text():
+        return Response(200, None, Content(b"text/plain; charset=utf-8", _body))
+
+    @app.router.get("/small")
+    async def get_small():
+        return Response(200, None, Content(b"application/json", b"{}"))
+
+    @app.router.get("/image")
+    async def get_image():
+        return Response(200, None, Content(b"image/png", _body))
+
+    return app
+
+
+@pytest.mark.parametrize("path", ["/json", "/text"])
+def test_compression(path):
+    response, body = _request(_make_app(), "get", path, {"Accept-Encoding": "gzip"})
+    assert response.status == 200
+    assert response.get_first_header(b"content-encoding") == b"gzip"
+    assert response.get_first_header(b"vary") == b"Accept-Encoding"
+    assert gzip.decompress(body) == _body
+
+
+@pytest.mark.parametrize("path", ["/small", "/image"])
+def test_compression_skipped(path):
+    response, body = _request(_make_app(), "get", path, {"Accept-Encoding": "gzip"})
+    assert response.get_first_header(b"content-encoding") is None
+    assert not body.startswith(b"\x1f\x8b")
+
+
+def test_compression_identity():
+    app = Application()
+    configure_compression(app)
+    middleware = app.middlewares[-1]
+
+    async def handler(request):
+        return Response(200, [(b"etag", b'"v1"')], Content(b"application/json", _body))
+
+    request = Request("GET", b"/", [(b"accept-encoding", b"identity")])
+    response = asyncio.run(middleware(request, handler))
+    assert response.get_first_header(b"content-encoding") is None
+    assert response.get_first_header(b"etag") == b'"v1"'
+    assert response.get_first_header(b"vary") == b"Accept-Encoding"
+    assert response.content.body == _body
+
+
+def test_compression_executor():
+    with ThreadPoolExecutor(1) as executor:
+        app = _make_app(encodings=("gzip",), executor=executor, offload_threshold=0)
+        response, body = _request(app, "get", "/json", {"Accept-Encoding": "br, gzip"})
+    assert response.get_first_header(b"content-encoding") == b"gzip"
+    assert gzip.decompress(body) == _body
+
+
+def test_compression_etags():
+    app = _make_app(encodings=("gzip",))
+    configure_etags(app)
+
+    @app.router.get("/version")
+    async def get_version():
+        return Response(200, [(b"etag", b'"v1"')], Content(b"application/json", _body))
+
+    etag = make_etag(_body)
+    gzip_etag = make_encoded_etag(etag, "gzip")
+
+    response, _ = _request(app, "get", "/json", {"Accept-Encoding": "gzip"})
+    assert response.get_first_header(b"etag") == gzip_etag
+
+    response, _ = _request(app, "get", "/version", {"Accept-Encoding": "gzip"})
+    assert response.get_first_header(b"etag") == b'"v1-gzip"'
+
+    headers = {"Accept-Encoding": "gzip", "If-None-Match": gzip_etag.decode()}
+    response, _ = _request(app, "get", "/json", headers)
+    assert response.status == 304
+    assert response.get_first_header(b"etag") == gzip_etag
+
+    # not compressed, but the ETag still depends on the encoding
+    response, body = _request(app, "get", "/small", {"Accept-Encoding": "gzip"})
+    assert response.get_first_header(b"content-encoding") is None
+    assert response.get_first_header(b"etag") == make_encoded_etag(
+        make_etag(b"{}"), "gzip"
+    )
+    assert response.get_first_header(b"vary") == b"Accept-Encoding"
+    assert body == b"{}"
+
+
+def test_compression_cached_content():
+    app = _make_app()
+    content = CachedContent(b"application/json", _body, encodings=("gzip",))
+
+    @app.router.get("/cached")
+    async def get_cached(request: Request):
+        return content.get_response(request)
+
+    response, body = _request(app, "get", "/cached", {"Accept-Encoding": "gzip"})
+    assert response.get_first_header(b"etag") == make_encoded_etag(content.etag, "gzip")
+    assert response.get_headers(b"content-encoding") == [b"gzip"]
+    assert gzip.decompress(body) == _body
+
+
+def test_etags():
+    app = Application()
+    configure_etags(app)
+
+    @app.router.get("/")
+    async def get_doc():
+        return Response(200, [(b"cache-control", b"no-cache")], Content(b"a", b"b"))
+
+    @app.router.get("/version")
+    async def get_version():
+        return Response(200, [(b"etag", b'"v1"')], Content(b"a", b"b"))
+
+    @app.router.post("/")
+    async def post_doc():
+        return Response(200, None, Content(b"a", b"b"))
+
+    async def run():
+        await app.start()
+        client = TestClient(app)
+
+        response = await client.get("/")
+        etag = response.get_first_header(b"etag")
+        assert etag == make_etag(b"b")
+        assert await response.read() == b"b"
+
+        response = await client.get("/", headers={"If-None-Match": etag.decode()})
+        assert response.status == 304
+        assert response.get_first_header(b"etag") == etag
+        assert response.get_first_header(b"cache-control") == b"no-cache"
+        assert not await response.read()
+
+        response = await client.get("/version", headers={"If-None-Match": '"v1"'})
+        assert response.status == 304
+
+        response = await client.post("/", headers={"If-None-Match": etag.decode()})
+        assert response.status == 200
+        assert response.get_first_header(b"etag") is None
+
+    asyncio.run(run())
+
+
+def test_log_context():
+    app = Application()
+    configure_forwarded_headers(app)
+    configure_log_context(app)
+    records = []
+    handler_id = logger.add(lambda m: records.append(m.record), level="INFO")
+
+    @app.router.get("/items/{id}")
+    async def get_item(id: str):
+        logger.info("get item")
+        return Response(204)
+
+    async def run():
+        await app.start()
+        client = TestClient(app)
+        response = await client.get(
+            "/items/1",
+            headers={"X-Request-ID": "abc", "X-Forwarded-For": "10.0.0.1"},
+        )
+        assert response.get_first_header(b"x-request-id") == b"abc"
+
+        response = await client.get("/items/2")
+        assert response.get_first_header(b"x-request-id")
+
+    try:
+        asyncio.run(run())
+    finally:
+        logger.remove(handler_id)
+
+    assert records[0]["extra"] == {
+        "request_id": "abc",
+        "route": "/items/{id}",
+        "client_ip": "10.0.0.1",
+    }
+    assert records[1]["extra"]["request_id"] != "abc"
+    assert records[1]["extra"]["route"] == "/items/{id}"
+
+
+def test_log_context_unhandled_exception():
+    app = Application()
+    configure_log_context(app)
+    records = []
+    handler_id = logger.add(lambda m: records.append(m.record), level="ERROR")
+    intercept = InterceptHandler()
+    app.logger.addHandler(intercept)
+
+    @app.router.get("/error")
+    async def get_error():
+        raise RuntimeError("error")
+
+    async def run():
+        await app.start()
+        client = TestClient(app)
+        return await client.get("/error", headers={"X-Request-ID": "abc"})
+
+    try:
+        response = asyncio.run(run())
+    finally:
+        logger.remove(handler_id)
+        app.logger.removeHandler(intercept)
+
+    assert response.status == 500
+    assert response.get_first_header(b"x-request-id") == b"abc"
+    assert records[0]["message"].startswith("Unhandled exception")
+    assert records[0]["extra"]["request_id"] == "abc"
+    assert records[0]["extra"]["route"] == "/error"
+
+
+def test_log_context_requires_loguru(monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(
+        importlib.util,
+        "find_spec",
+        lambda name, *args: None if name == "loguru" else find_spec(name, *args),
+    )
+    with pytest.raises(ImportError, match="loguru"):
+        configure_log_context(Application())
+
+
+@frozen
+class Item:
+    name: str
+
+
+def test_metrics():
+    app = Application()
+    configure_metrics(app)
+    json_response = JSONResponseFunc()
+
+    @app.router.post("/items/{id}")
+    async def post_item(id: str, item: FromAttrs[Item]):
+        return json_response({"id": id, "name": item.value.name})
+
+    @app.router.get("/error")
+    async def get_error():
+        raise NotFound
+
+    @app.router.get("/stream")
+    async def get_stream():
+        return json_response.stream([{"id": "1"}, {"id": "2"}])
+
+    async def run():
+        await app.start()
+        client = TestClient(app)
+        response = await client.post(
+            "/items/1", content=Content(b"application/json", b'{"name":"a"}')
+        )
+        assert response.status == 200
+        response = await client.get("/error")
+        assert response.status == 404
+        response = await client.get("/stream")
+        assert await response.read() == b'[{"id":"1"},{"id":"2"}]'
+
+        response = await client.get("/metrics")
+        assert response.status == 200
+        response = await client.get("/metrics")
+        return (await response.read()).decode()
+
+    try:
+        body = asyncio.run(run())
+    finally:
+        registry.enabled = False
+
+    lines = body.splitlines()
+    assert (
+        'oes_http_request_duration_seconds_count{method="POST",route="/items/{id}",'
+        'status="200"} 1'
+    ) in lines
+    assert (
+        'oes_http_request_duration_seconds_count{method="GET",route="/error",'
+        'status="404"} 1'
+    ) in lines
+    assert (
+        'oes_http_request_size_bytes_sum{method="POST",route="/items/{id}"} 12.0'
+    ) in lines
+    assert (
+        'oes_http_response_size_bytes_sum{method="POST",route="/items/{id}",'
+        'status="200"} 21.0'
+    ) in lines
+    assert any(
+        line.startswith('oes_binder_seconds_count{type="Item",stage="read"}')
+        for line in lines
+    )
+    assert any(
+        line.startswith('oes_binder_seconds_count{type="Item",stage="parse"}')
+        for line in lines
+    )
+    assert "oes_serializer_seconds_count 2" in lines
+    assert not any('route="/metrics"' in line for line in lines)
+
+
+def test_tracing():
+    app = Application()
+    sink = RingBufferSink()
+    configure_tracing(app, sink)
+    json_response = JSONResponseFunc()
+
+    @app.router.post("/items/{id}")
+    async def post_item(id: str, item: FromAttrs[Item]):
+        return json_response({"id": id, "name": item.value.name})
+
+    async def run():
+        await app.start()
+        client = TestClient(app)
+        response = await client.post(
+            "/items/1", content=Content(b"application/json", b'{"name":"a"}')
+        )
+        assert response.status == 200
+
+    try:
+        asyncio.run(run())
+    finally:
+        set_sink(None)
+
+    request_span = sink.spans[-1]
+    assert request_span.name == "request"
+    assert request_span.attributes == {
+        "method": "POST",
+        "route": "/items/{id}",
+        "status": 200,
+    }
+    trace = sink.get_trace(request_span.trace_id)
+    assert [s.name for s in trace] == [
+        "request",
+        "binder.read",
+        "binder.parse",
+        "serialize",
+    ]
+    assert all(s.parent_id == request_span.span_id for s in trace[1:])
+    assert trace[1].attributes == {"type": "Item"}
+
+
+def _make_cors_app(**kwargs):
+    app = Application()
+    configure_cors(app, **kwargs)
+
+    @app.router.get("/items")
+    async def get_items():
+        return Response(204)
+
+    @app.router.post("/items")
+    async def post_items():
+        return Response(204)
+
+    @app.router.delete("/items")
+    async def delete_items():
+        raise NotFound()
+
+    return app
+
+
+def _preflight(app, origin, method="GET", headers=None, path="/items"):
+    request_headers = {
+        "Origin": origin,
+        "Access-Control-Request-Method": method,
+    }
+    if headers:
+        request_headers["Access-Control-Request-Headers"] = headers
+    response, _ = _request(app, "options", path, request_headers)
+    return response
+
+
+@pytest.mark.parametrize(
+    "origin, allowed",
+    [
+        ("https://example.com", True),
+        ("https://EXAMPLE.com", True),
+        ("https://a.b.example.net", True),
+        ("https://example.net", False),
+        ("https://evil.com/.example.net", False),
+        ("http://localhost:8080", True),
+        ("http://localhost:x", False),
+        ("https://app-1.test", True),
+        ("https://other.com", False),
+    ],
+)
+def test_cors_origins(origin, allowed):
+    app = _make_cors_app(
+        allow_origins=[
+            "https://example.com",
+            "https://*.example.net",
+            "http://localhost:*",
+            re.compile(r"https://app-\d+\.test"),
+        ],
+        allow_headers="Content-Type",
+    )
+    response = _preflight(app, origin, headers="content-type")
+    if allowed:
+        assert response.status == 200
+        assert response.get_first_header(b"access-control-allow-origin") == (
+            origin.encode()
+        )
+        assert response.get_first_header(b"vary") == b"Origin"
+        assert response.get_first_header(b"access-control-allow-headers") == (
+            b"content-type"
+        )
+        assert response.get_first_header(b"access-control-max-age") == b"600"
+    else:
+        assert response.status == 400
+
+
+def test_cors_preflight_validation():
+    app = _make_cors_app(
+        allow_origins="*", allow_methods="GET, POST", allow_headers=["X-Test"]
+    )
+    response = _preflight(app, "https://example.com", "POST", "x-test")
+    assert response.status == 200
+    assert response.get_first_header(b"access-control-allow-origin") == b"*"
+    assert response.get_first_header(b"access-control-allow-methods") == (b"GET, POST")
+    assert _preflight(app, "https://example.com", "DELETE").status == 400
+    assert _preflight(app, "https://example.com", "GET", "x-other").status == 400
+
+
+def test_cors_preflight_unknown_route():
+    app = _make_cors_app(allow_origins="*")
+    assert _preflight(app, "https://example.com", path="/other").status == 404
+    assert _preflight(app, "https://example.com", "PUT").status == 404
+    assert _preflight(app, "https://example.com", "DELETE").status == 200
+
+
+def test_cors_preflight_cache():
+    app = _make_cors_app(allow_origins="*", allow_credentials=True, cache_size=2)
+    middleware = app.middlewares[0]
+    for origin in ("https://a.com", "https://b.com", "https://a.com", "https://c.com"):
+        response = _preflight(app, origin)
+        assert response.get_first_header(b"access-control-allow-origin") == (
+            origin.encode()
+        )
+        assert response.get_first_header(b"access-control-allow-credentials") == (
+            b"true"
+        )
+        assert response.get_first_header(b"access-control-allow-methods") == b"GET"
+
+    assert [k[0] for k in middleware._preflights] == [
+        b"https://a.com",
+        b"https://c.com",
+    ]
+
+
+def test_cors_request():
+    app = _make_cors_app(
+        allow_origins="https://example.com", expose_headers=["X-Count"]
+    )
+    response, _ = _request(app, "get", "/items", {"Origin": "https://example.com"})
+    assert response.status == 204
+    assert response.get_first_header(b"access-control-allow-origin") == (
+        b"https://example.com"
+    )
+    assert response.get_first_header(b"access-control-expose-headers") == b"X-Count"
+
+    response, _ = _request(app, "delete", "/items", {"Origin": "https://example.com"})
+    assert response.status == 404
+    assert response.get_first_header(b"access-control-allow-origin") == (
+        b"https://example.com"
+    )
+
+    response, _ = _request(app, "get", "/items", {"Origin": "https://other.com"})
+    assert response.status == 400
+
+    response, _ = _request(app, "get", "/items", {})
+    assert response.status == 204
+    assert not response.has_header(b"access-control-allow-origin")
+
+    # only OPTIONS requests are preflight requests
+    headers = {"Origin": "https://example.com", "Access-Control-Request-Method": "GET"}
+    response, _ = _request(app, "get", "/items", headers)
+    assert response.status == 204
+    assert not response.has_header(b"access-control-max-age")
+
+
+def _make_forwarded_app(**kwargs):
+    app = Application()
+    configure_forwarded_headers(app, **kwargs)
+
+    @app.router.get("/ip")
+    async def get_ip(request: Request):
+        return Response(
+            200, None, Content(b"text/plain", request.original_client_ip.encode())
+        )
+
+    return app
+
+
+def _get_ip(app, forwarded_for):
+    response, body = _request(app, "get", "/ip", {"X-Forwarded-For": forwarded_for})
+    return response.status, body
+
+
+def test_forwarded_headers_trusted_networks():
+    app = _make_forwarded_app(
+        trusted_networks=["127.0.0.0/8", "10.0.0.0/16", "10.1.0.0/16"],
+        forward_limit=2,
+    )
+    middleware = app.middlewares[0]
+
+    assert _get_ip(app, "203.0.113.5, 10.1.2.3") == (200, b"203.0.113.5")
+    assert _get_ip(app, "203.0.113.5, 10.1.2.3") == (200, b"203.0.113.5")
+    assert list(middleware._forwarded_for) == [b"203.0.113.5, 10.1.2.3"]
+
+    assert _get_ip(app, "203.0.113.5, 10.2.0.1")[0] == 400
+    assert _get_ip(app, "203.0.113.5, 10.0.0.1, 10.1.0.1")[0] == 400
+
+
+def test_forwarded_headers_untrusted_client():
+    app = _make_forwarded_app(trusted_networks=["10.0.0.0/8"])
+    assert _get_ip(app, "203.0.113.5")[0] == 400
+
+
+@pytest.mark.parametrize(
+    "address, expected",
+    [
+        ("10.2.3.4", True),
+        ("11.0.0.0", False),
+        ("9.255.255.255", False),
+        ("192.168.2.255", True),
+        ("192.168.3.0", False),
+        ("2001:db8::1", True),
+        ("::ffff:10.0.0.1", True),
+        ("::1", False),
+    ],
+)
+def test_network_index(address, expected):
+    index = _NetworkIndex(
+        ip_network(n)
+        for n in (
+            "10.0.0.0/8",
+            "10.1.0.0/16",
+            "192.168.1.0/24",
+            "192.168.2.0/24",
+            "2001:db8::/32",
+        )
+    )
+    assert (ip_address(address) in index) is expected
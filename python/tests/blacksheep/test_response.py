@@ -1,7 +1,29 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+from datetime import datetime, timezone
+from typing import Optional
+
+import orjson
 import pytest
+from attrs import frozen
+from blacksheep import Request
 from blacksheep.exceptions import NotFound
 from oes.util.blacksheep import JSONResponseFunc
-from oes.util.blacksheep.response import check_404
+from oes.util.blacksheep.response import (
+    CachedContent,
+    PreconditionFailed,
+    PreconditionRequired,
+    check_404,
+    check_if_match,
+    check_not_modified,
+    etag_matches,
+    make_encoded_etag,
+    make_etag,
+    make_json_converter,
+    make_version_etag,
+)
 
 
 class Custom:
@@ -32,3 +54,192 @@ def test_check_404():
 
     with pytest.raises(NotFound):
         check_404(None)
+
+
+def test_make_etag():
+    etag = make_etag(b"example")
+    assert etag.startswith(b'"') and etag.endswith(b'"')
+    assert make_etag(b"example") == etag
+    assert make_etag(b"other") != etag
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    (
+        (None, False),
+        (b"*", True),
+        (b'"abc"', True),
+        (b'W/"abc"', True),
+        (b'"xyz", "abc"', True),
+        (b'"xyz"', False),
+        (b'"abc-gzip"', True),
+        (b'W/"abc-br"', True),
+        (b'"xyz-gzip"', False),
+    ),
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, b'"abc"') == expected
+
+
+@pytest.mark.parametrize(
+    "header, etag, expected",
+    (
+        (b'"abc"', b'"abc"', True),
+        (b'W/"abc"', b'"abc"', False),
+        (b'"abc"', b'W/"abc"', False),
+        (b'"xyz", "abc"', b'"abc"', True),
+        (b"*", b'"abc"', True),
+        (b'"abc-zstd"', b'"abc"', False),
+        (b'"abc"', b'"abc-gzip"', False),
+        (b'"x-gzip"', b'"x"', False),
+    ),
+)
+def test_etag_matches_strong(header, etag, expected):
+    assert etag_matches(header, etag, weak=False) == expected
+
+
+def test_make_encoded_etag():
+    etag = make_etag(b"data")
+    assert make_encoded_etag(etag, "gzip") == etag[:-1] + b'-gzip"'
+    assert make_encoded_etag(etag, "gzip") != make_encoded_etag(etag, "br")
+    assert make_encoded_etag(b'W/"abc"', "br") == b'W/"abc-br"'
+    assert not etag_matches(etag, make_encoded_etag(etag, "gzip"))
+
+
+def test_check_not_modified():
+    etag = make_version_etag(3)
+    assert etag == make_version_etag("3")
+    assert etag != make_version_etag(4)
+
+    request = Request("GET", b"/", [(b"if-none-match", etag)])
+    response = check_not_modified(request, etag)
+    assert response.status == 304
+    assert response.get_first_header(b"etag") == etag
+
+    assert check_not_modified(request, make_version_etag(4)) is None
+    assert check_not_modified(Request("GET", b"/", []), etag) is None
+
+
+def test_check_if_match():
+    etag = make_version_etag(3)
+    check_if_match(Request("PUT", b"/", [(b"if-match", etag)]), etag)
+    check_if_match(Request("PUT", b"/", []), etag, required=False)
+
+    with pytest.raises(PreconditionRequired):
+        check_if_match(Request("PUT", b"/", []), etag)
+
+    with pytest.raises(PreconditionFailed):
+        check_if_match(Request("PUT", b"/", [(b"if-match", etag)]), None)
+
+    with pytest.raises(PreconditionFailed):
+        check_if_match(
+            Request("PUT", b"/", [(b"if-match", make_version_etag(2))]), etag
+        )
+
+
+def test_cached_content():
+    content = CachedContent(b"application/json", b'{"a":1}', encodings=("gzip",))
+    gzip_etag = make_encoded_etag(content.etag, "gzip")
+
+    request = Request("GET", b"/", [(b"accept-encoding", b"gzip, br")])
+    response = content.get_response(request)
+    assert response.status == 200
+    assert response.get_first_header(b"etag") == gzip_etag
+    assert response.get_first_header(b"content-encoding") == b"gzip"
+    assert gzip.decompress(response.content.body) == b'{"a":1}'
+
+    request = Request("GET", b"/", [])
+    response = content.get_response(request)
+    assert response.get_first_header(b"etag") == content.etag
+    assert response.get_first_header(b"content-encoding") is None
+    assert response.content.body == b'{"a":1}'
+
+    request = Request("GET", b"/", [(b"if-none-match", content.etag)])
+    response = content.get_response(request)
+    assert response.status == 304
+    assert response.content is None
+
+    request = Request(
+        "GET", b"/", [(b"accept-encoding", b"gzip"), (b"if-none-match", gzip_etag)]
+    )
+    response = content.get_response(request)
+    assert response.status == 304
+    assert response.get_first_header(b"etag") == gzip_etag
+
+
+@frozen
+class MyClass:
+    a: int
+    b: datetime
+    c: set[str]
+    d: Optional[MyClass] = None
+
+
+def test_json_response_converter():
+    json_response = JSONResponseFunc(default=_default, converter=make_json_converter())
+    dt = datetime(2020, 1, 1, 12, 30, tzinfo=timezone.utc)
+    obj = MyClass(1, dt, {"x"}, MyClass(2, dt, set()))
+
+    expected = (
+        b'{"a":1,"b":"2020-01-01T12:30:00+00:00","c":["x"],'
+        b'"d":{"a":2,"b":"2020-01-01T12:30:00+00:00","c":[],"d":null}}'
+    )
+    assert json_response(obj).content.body == expected
+    assert (
+        json_response([obj, obj]).content.body
+        == b"[" + expected + b"," + expected + b"]"
+    )
+    assert json_response({"x": obj, "y": Custom()}).content.body == (
+        b'{"x":' + expected + b',"y":"123"}'
+    )
+
+    with pytest.raises(TypeError):
+        JSONResponseFunc(converter=make_json_converter())(object())
+
+
+def _read_chunks(response):
+    async def read():
+        return [chunk async for chunk in response.content.stream()]
+
+    return asyncio.run(read())
+
+
+async def _async_items():
+    yield {"a": 1}
+    yield Custom()
+
+
+@pytest.mark.parametrize(
+    "items, ndjson, expected",
+    [
+        ([], False, b"[]"),
+        ([], True, b""),
+        ([{"a": 1}, Custom()], False, b'[{"a":1},"123"]'),
+        ([{"a": 1}, Custom()], True, b'{"a":1}\n"123"\n'),
+        (_async_items, False, b'[{"a":1},"123"]'),
+        (_async_items, True, b'{"a":1}\n"123"\n'),
+    ],
+)
+def test_json_response_stream(items, ndjson, expected):
+    json_response = JSONResponseFunc(default=_default)
+    if callable(items):
+        items = items()
+
+    response = json_response.stream(items, ndjson=ndjson, status_code=201)
+    assert response.status == 201
+    assert response.content.type == (
+        b"application/x-ndjson" if ndjson else b"application/json"
+    )
+    assert b"".join(_read_chunks(response)) == expected
+
+
+def test_json_response_stream_chunks():
+    json_response = JSONResponseFunc(converter=make_json_converter())
+    dt = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    items = (MyClass(i, dt, set()) for i in range(100))
+
+    chunks = _read_chunks(json_response.stream(items, chunk_size=256))
+    assert len(chunks) > 1
+    assert all(len(c) >= 256 for c in chunks[:-1])
+    result = orjson.loads(b"".join(chunks))
+    assert [r["a"] for r in result] == list(range(100))
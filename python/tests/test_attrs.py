@@ -1,3 +1,7 @@
+from __future__ import annotations
+
+import gc
+import weakref
 from dataclasses import dataclass
 
 import pytest
@@ -7,7 +11,14 @@ try:
 except ImportError:
     pytest.skip("attrs missing", allow_module_level=True)
 
-from oes.util import is_attrs_class, is_attrs_instance
+from typing import Literal, Optional, Union
+
+from oes.util import (
+    get_attrs_class_info,
+    get_type_kind,
+    is_attrs_class,
+    is_attrs_instance,
+)
 
 
 @define
@@ -54,3 +65,74 @@ def test_is_attrs_class(obj, expected):
 )
 def test_is_attrs_instance(obj, expected):
     assert is_attrs_instance(obj) == expected
+
+
+@define
+class MyClass3:
+    a: Optional[MyClass]
+    b: list[MyClass2]
+    c: dict[str, int]
+    d: Literal["x"]
+    e: Union[int, str]
+    f: tuple[int, str]
+
+
+def test_get_attrs_class_info():
+    info = get_attrs_class_info(MyClass3)
+    assert get_attrs_class_info(MyClass3) is info
+
+    assert [(f.name, f.type, f.optional, f.kind) for f in info.fields] == [
+        ("a", Optional[MyClass], True, "union"),
+        ("b", list[MyClass2], False, "sequence"),
+        ("c", dict[str, int], False, "mapping"),
+        ("d", Literal["x"], False, "literal"),
+        ("e", Union[int, str], False, "union"),
+        ("f", tuple[int, str], False, "other"),
+    ]
+    assert info.type_hints["a"] == Optional[MyClass]
+    assert info.fields[0].attribute.name == "a"
+
+
+def test_get_attrs_class_info_unresolved():
+    @define
+    class Local:
+        a: Missing  # noqa: F821
+
+    assert get_attrs_class_info(Local).fields[0].type == "Missing"
+
+
+def test_get_attrs_class_info_not_attrs():
+    class Local:
+        a: int
+
+    with pytest.raises(TypeError):
+        get_attrs_class_info(Local)
+
+
+def test_get_attrs_class_info_weak():
+    from oes.util.attrs import _class_info
+
+    @define
+    class Local:
+        a: int
+
+    get_attrs_class_info(Local)
+    assert Local in _class_info
+
+    ref = weakref.ref(Local)
+    del Local
+    gc.collect()
+    assert ref() is None
+
+
+@pytest.mark.parametrize(
+    "t, expected",
+    (
+        (MyClass, "attrs"),
+        (int, "other"),
+        (frozenset[int], "sequence"),
+        (tuple[int, ...], "sequence"),
+    ),
+)
+def test_get_type_kind(t, expected):
+    assert get_type_kind(t) == expected
@@ -1,10 +1,12 @@
+import sys
 from typing import Optional
 
+import orjson
 import pytest
 from attrs import field, frozen, validators
-from cattrs import BaseValidationError
+from cattrs import BaseValidationError, IterableValidationError, IterableValidationNote
 from cattrs.preconf.json import make_converter
-from oes.util.cattrs import ExceptionDetails, get_exception_details
+from oes.util.cattrs import ExceptionDetails, get_exception_details, get_exception_dicts
 
 pytest.importorskip("cattrs")
 
@@ -65,3 +67,43 @@ def test_get_exception_details(data, expected):
     details = get_exception_details(err.value)
 
     assert details == list(expected)
+
+
+def _get_list_error():
+    data = {"b": {"b_val": 1}, "c": [{} for _ in range(5)]}
+    with pytest.raises(BaseValidationError) as err:
+        converter.structure(data, ClassA)
+    return err.value
+
+
+def test_get_exception_details_options():
+    exc = _get_list_error()
+
+    assert len(get_exception_details(exc)) == 5
+    assert get_exception_details(exc, max_errors=2) == [
+        ExceptionDetails(("c", 0), "A value is required for 'c_val'"),
+        ExceptionDetails(("c", 1), "A value is required for 'c_val'"),
+    ]
+    assert get_exception_details(exc, deduplicate=True, path=(3,)) == [
+        ExceptionDetails((3, "c", 0), "A value is required for 'c_val'"),
+    ]
+
+
+def test_get_exception_dicts():
+    exc = _get_list_error()
+    assert get_exception_dicts(exc, max_errors=1) == [
+        {"path": ("c", 0), "message": "A value is required for 'c_val'"},
+    ]
+    assert orjson.dumps(get_exception_dicts(exc, max_errors=1)) == (
+        b'[{"path":["c",0],"message":"A value is required for \'c_val\'"}]'
+    )
+
+
+def test_get_exception_details_deep():
+    exc = ValueError("invalid")
+    for _ in range(sys.getrecursionlimit() * 2):
+        exc = IterableValidationError("error", [exc], list)
+        exc.__notes__ = [IterableValidationNote("note", 0, int)]
+
+    details = get_exception_details(exc)
+    assert details == [ExceptionDetails((0,) * sys.getrecursionlimit() * 2, "invalid")]
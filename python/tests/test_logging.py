@@ -0,0 +1,306 @@
+import importlib.util
+import io
+import logging
+import sys
+import threading
+from datetime import datetime
+
+import orjson
+import pytest
+from loguru import logger
+from oes.util.logging import (
+    InterceptHandler,
+    LogLimiter,
+    QueueSink,
+    _get_min_level,
+    configure_json_logging,
+)
+
+
+@pytest.fixture
+def messages():
+    messages = []
+    handler_id = logger.add(messages.append, level="INFO", format="{message}")
+    yield messages
+    logger.remove(handler_id)
+
+
+@pytest.fixture
+def std_logger():
+    handler = InterceptHandler()
+    std_logger = logging.getLogger("test_logging")
+    std_logger.setLevel(logging.DEBUG)
+    std_logger.addHandler(handler)
+    yield std_logger
+    std_logger.removeHandler(handler)
+
+
+def test_intercept_handler(messages, std_logger):
+    line = sys._getframe().f_lineno + 2
+    for i in range(3):
+        std_logger.info("message %s", i)
+
+    assert [m.record["message"] for m in messages] == [
+        "message 0",
+        "message 1",
+        "message 2",
+    ]
+    for m in messages:
+        assert m.record["function"] == "test_intercept_handler"
+        assert m.record["line"] == line
+        assert m.record["level"].name == "INFO"
+
+    handler = std_logger.handlers[0]
+    assert len(handler._depths) == 1
+
+
+def test_intercept_handler_levels(messages, std_logger):
+    std_logger.debug("dropped")
+    std_logger.log(25, "custom")
+    std_logger.warning("warning")
+
+    assert [(m.record["level"].name, m.record["message"]) for m in messages] == [
+        ("Level 25", "custom"),
+        ("WARNING", "warning"),
+    ]
+
+
+def test_intercept_handler_min_level(messages):
+    assert _get_min_level(logger) == logger._core.min_level
+    assert _get_min_level(object()) == 0
+
+
+def test_intercept_handler_call_sites(messages, std_logger):
+    def log_a():
+        std_logger.info("a")
+
+    def log_b():
+        logging.LoggerAdapter(std_logger, {}).info("b")
+
+    for _ in range(2):
+        log_a()
+        log_b()
+
+    assert [m.record["function"] for m in messages] == [
+        "log_a",
+        "log_b",
+        "log_a",
+        "log_b",
+    ]
+
+
+def test_json_logging():
+    stream = io.StringIO()
+    configure_json_logging("INFO", stream=stream)
+    try:
+        with logger.contextualize(request_id="abc"):
+            logger.info("message {}", 1)
+        logging.getLogger("test_logging").warning("warning")
+        try:
+            raise ValueError("error")
+        except ValueError:
+            logger.exception("exception")
+        logger.debug("dropped")
+    finally:
+        logger.remove()
+        logger.add(sys.stderr)
+        logging.basicConfig(handlers=[], force=True)
+
+    lines = [orjson.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 3
+    assert lines[0]["message"] == "message 1"
+    assert lines[0]["level"] == "INFO"
+    assert lines[0]["request_id"] == "abc"
+    assert lines[0]["function"] == "test_json_logging"
+    assert datetime.fromisoformat(lines[0]["time"])
+    assert lines[1]["message"] == "warning"
+    assert lines[1]["function"] == "test_json_logging"
+    assert "request_id" not in lines[1]
+    assert "ValueError: error" in lines[2]["exception"]
+
+
+class BlockingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, s):
+        self.entered.set()
+        self.release.wait(5)
+        return super().write(s)
+
+
+@pytest.fixture
+def blocking_sink(request):
+    stream = BlockingStream()
+    sink = QueueSink(stream, maxsize=2, overflow=request.param)
+    handler_id = logger.add(sink, level="DEBUG", format="{message}")
+
+    # the first record is being written, the queue is empty
+    logger.info("0")
+    assert stream.entered.wait(5)
+
+    yield stream, sink
+
+    stream.release.set()
+    logger.remove(handler_id)
+
+
+def test_queue_sink():
+    stream = io.StringIO()
+    sink = QueueSink(stream, batch_size=3)
+    handler_id = logger.add(sink, format="{message}")
+    for i in range(10):
+        logger.info("{}", i)
+
+    assert sink.join(5)
+    assert stream.getvalue() == "".join(f"{i}\n" for i in range(10))
+    assert sink.written == 10
+    assert sink.dropped == 0
+    assert sink.queued == 0
+
+    logger.info("last")
+    logger.remove(handler_id)
+    assert stream.getvalue().endswith("9\nlast\n")
+
+
+@pytest.mark.parametrize("blocking_sink", ["drop-oldest"], indirect=True)
+def test_queue_sink_drop_oldest(blocking_sink):
+    stream, sink = blocking_sink
+    for i in range(1, 5):
+        logger.info("{}", i)
+    assert sink.queued == 2
+    assert sink.dropped == 2
+
+    stream.release.set()
+    assert sink.join(5)
+    assert stream.getvalue() == "0\n3\n4\n"
+
+
+@pytest.mark.parametrize("blocking_sink", ["drop-debug"], indirect=True)
+def test_queue_sink_drop_debug(blocking_sink):
+    stream, sink = blocking_sink
+    logger.info("1")
+    logger.debug("2")
+    logger.debug("3")
+    logger.debug("4")
+    assert sink.queued == 2
+    assert sink.dropped == 2
+
+    stream.release.set()
+    assert sink.join(5)
+    assert stream.getvalue() == "0\n1\n2\n"
+
+
+@pytest.mark.parametrize("blocking_sink", ["block"], indirect=True)
+def test_queue_sink_block(blocking_sink):
+    stream, sink = blocking_sink
+    logger.info("1")
+    logger.info("2")
+
+    thread = threading.Thread(target=logger.info, args=("3",))
+    thread.start()
+    thread.join(0.1)
+    assert thread.is_alive()
+
+    stream.release.set()
+    thread.join(5)
+    assert sink.join(5)
+    assert stream.getvalue() == "0\n1\n2\n3\n"
+    assert sink.dropped == 0
+
+
+def test_json_logging_enqueue():
+    stream = io.StringIO()
+    sink = configure_json_logging("INFO", stream=stream, enqueue=True)
+    try:
+        logger.info("message")
+        assert sink.join(5)
+    finally:
+        logger.remove()
+        logger.add(sys.stderr)
+        logging.basicConfig(handlers=[], force=True)
+
+    assert orjson.loads(stream.getvalue())["message"] == "message"
+
+
+@pytest.mark.parametrize("enqueue", [False, True])
+def test_json_logging_requires_orjson(monkeypatch, enqueue):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(
+        importlib.util,
+        "find_spec",
+        lambda name, *args: None if name == "orjson" else find_spec(name, *args),
+    )
+    with pytest.raises(ImportError, match="orjson"):
+        configure_json_logging(enqueue=enqueue)
+
+
+@pytest.fixture
+def limited():
+    messages = []
+    limiter = LogLimiter(window=60, sample_rates={"sampled": 0.25})
+    handler_id = logger.add(
+        messages.append, level="DEBUG", format="{message}", filter=limiter
+    )
+    yield limiter, messages
+    logger.remove(handler_id)
+
+
+def test_log_limiter_deduplicate(limited):
+    limiter, messages = limited
+    for _ in range(5):
+        logger.error("error {}", 1)
+        logger.error("error {}", 2)
+
+    assert messages == ["error 1\n", "error 2\n"]
+    assert limiter.suppressed == 8
+
+    limiter.flush()
+    assert sorted(messages[2:]) == [
+        "4 similar messages suppressed: error 1\n",
+        "4 similar messages suppressed: error 2\n",
+    ]
+    assert messages[2].record["extra"]["suppressed"] == 4
+    assert messages[2].record["level"].name == "ERROR"
+
+    logger.error("error {}", 1)
+    assert messages[-1] == "error 1\n"
+
+
+def test_log_limiter_window(limited):
+    limiter, messages = limited
+    limiter.window = 0
+    logger.info("message")
+    logger.info("message")
+    assert messages == ["message\n", "message\n"]
+
+
+def test_log_limiter_sample(limited):
+    limiter, messages = limited
+    sampled = logger.patch(lambda r: r.update(name="sampled.child"))
+    for i in range(8):
+        sampled.info("info {}", i)
+        sampled.warning("warning {}", i)
+
+    assert [m for m in messages if m.startswith("info")] == ["info 0\n", "info 4\n"]
+    assert len([m for m in messages if m.startswith("warning")]) == 8
+    assert limiter.sampled_out == 6
+
+
+@pytest.mark.parametrize("rate", [0.1, 0.6, 0.75, 0.9])
+def test_log_limiter_sample_rate(rate):
+    messages = []
+    limiter = LogLimiter(sample_rate=rate)
+    handler_id = logger.add(
+        messages.append, level="DEBUG", format="{message}", filter=limiter
+    )
+    try:
+        for i in range(100):
+            logger.info("info {}", i)
+    finally:
+        logger.remove(handler_id)
+
+    assert len(messages) == pytest.approx(100 * rate, abs=1)
+    assert limiter.sampled_out == 100 - len(messages)
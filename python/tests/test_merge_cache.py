@@ -0,0 +1,96 @@
+import copy
+import pickle
+from unittest.mock import patch
+
+import orjson
+import pytest
+from oes.util import FrozenDict, MergeCache, content_hash, freeze, merge_dict
+
+
+def test_merge_cache():
+    cache = MergeCache()
+    a = {"a": {"b": 1, "l": [1]}, "c": 2}
+    b = {"a": {"c": 3}}
+
+    res = cache.merge_dict(a, b)
+    assert res == {"a": {"b": 1, "c": 3, "l": (1,)}, "c": 2}
+    assert isinstance(res, FrozenDict)
+    assert isinstance(res["a"], FrozenDict)
+
+    assert cache.merge_dict({"c": 2, "a": {"l": [1], "b": 1}}, {"a": {"c": 3}}) is res
+    assert cache.merge_dict(a, {"a": {"c": 4}}) is not res
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    with pytest.raises(TypeError):
+        res["c"] = 3
+
+
+def test_merge_cache_result_usable():
+    cache = MergeCache()
+    res = cache.merge_dict({"a": {"b": [1]}}, {"c": {2}})
+
+    assert orjson.dumps(res, default=list) == b'{"a":{"b":[1]},"c":[2]}'
+    assert merge_dict(res, {"a": {"d": 3}}) == {"a": {"b": (1,), "d": 3}, "c": {2}}
+    assert copy.deepcopy(res) is res
+    assert pickle.loads(pickle.dumps(res)) == res
+
+    for mutate in (
+        lambda: res["a"].update({"b": 2}),
+        lambda: res.pop("a"),
+        lambda: res.setdefault("d", 1),
+    ):
+        with pytest.raises(TypeError):
+            mutate()
+
+
+def test_merge_cache_key():
+    cache = MergeCache()
+    res = cache.merge_dict({"a": 1}, {"b": object()}, key=("base", 1))
+    assert cache.merge_dict({}, {}, key=("base", 1)) is res
+
+
+def test_merge_cache_lru():
+    cache = MergeCache(maxsize=2)
+    res1 = cache.merge_dict({}, {}, key=1)
+    cache.merge_dict({}, {}, key=2)
+    assert cache.merge_dict({}, {}, key=1) is res1
+    cache.merge_dict({}, {}, key=3)
+
+    assert len(cache) == 2
+    assert cache.merge_dict({}, {}, key=1) is res1
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_merge_cache_ttl():
+    cache = MergeCache(ttl=10)
+    with patch("time.monotonic", return_value=0):
+        res = cache.merge_dict({}, {}, key=1)
+    with patch("time.monotonic", return_value=5):
+        assert cache.merge_dict({}, {}, key=1) is res
+    with patch("time.monotonic", return_value=11):
+        assert cache.merge_dict({}, {}, key=1) is not res
+
+
+@pytest.mark.parametrize(
+    "a, b, equal",
+    (
+        ({"a": 1, "b": 2}, {"b": 2, "a": 1}, True),
+        ({"a": {1, 2}}, {"a": {2, 1}}, True),
+        ({"a": [1, 2]}, {"a": [2, 1]}, False),
+        ({"a": 1}, {"a": "1"}, False),
+        ({"a": 1}, {"a": True}, False),
+        ({1: "a"}, {"1": "a"}, False),
+        ({"a": {}}, {"a": []}, False),
+    ),
+)
+def test_content_hash(a, b, equal):
+    assert (content_hash(a) == content_hash(b)) == equal
+
+
+def test_content_hash_unsupported():
+    with pytest.raises(TypeError):
+        content_hash({"a": object()})
+
+
+def test_freeze():
+    assert freeze({"a": [1, {"b": {2}}]}) == {"a": (1, {"b": frozenset({2})})}
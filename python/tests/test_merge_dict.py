@@ -1,4 +1,7 @@
-from oes.util import merge_dict
+import sys
+
+import pytest
+from oes.util import CopyOnWriteDict, MergedView, merge_dict, merge_dicts
 
 
 def test_merge_dict():
@@ -32,3 +35,152 @@ def test_merge_dict():
     }
 
     assert b == {"c": 3, "a": {"c": 3}, "d": {}}
+
+
+def test_merge_dict_no_copy():
+    a = {"a": {"b": [1]}, "c": [2]}
+    b = {"a": {"c": [3]}, "d": [4]}
+
+    res = merge_dict(a, b, copy=False)
+    assert res == {"a": {"b": [1], "c": [3]}, "c": [2], "d": [4]}
+    assert res["a"] is not a["a"]
+    assert res["a"]["b"] is a["a"]["b"]
+    assert res["a"]["c"] is b["a"]["c"]
+    assert res["c"] is a["c"]
+    assert res["d"] is b["d"]
+
+
+def test_merge_dict_deep():
+    a = b = {}
+    for _ in range(sys.getrecursionlimit() * 2):
+        a = {"a": a}
+        b = {"a": b}
+
+    res = merge_dict(a, b, copy=False)
+    depth = 0
+    while res:
+        res = res["a"]
+        depth += 1
+    assert depth == sys.getrecursionlimit() * 2
+
+
+def test_merged_view():
+    a = {"a": {"b": 1, "x": 1}, "c": 2, "e": 5}
+    b = {"c": 3, "a": {"c": 3, "x": 2}, "d": {}}
+
+    view = MergedView(a, b)
+    assert view == merge_dict(a, b)
+    assert len(view) == 4
+    assert isinstance(view["a"], MergedView)
+    assert view["a"] is view["a"]
+    assert view["d"] is b["d"]
+    assert view["e"] == 5
+
+    with pytest.raises(KeyError):
+        view["x"]
+
+
+def test_copy_on_write_dict():
+    base = {"a": {"b": 1, "l": [1]}, "c": 2}
+    cow = CopyOnWriteDict(base)
+
+    cow["a"]["b"] = 2
+    cow["a"]["l"].append(2)
+    cow["c"] = 3
+    cow["d"] = 4
+    del cow["a"]["l"]
+
+    assert cow.to_dict() == {"a": {"b": 2}, "c": 3, "d": 4}
+    assert "l" not in cow["a"]
+    assert len(cow) == 3
+    assert base == {"a": {"b": 1, "l": [1]}, "c": 2}
+
+    with pytest.raises(KeyError):
+        del cow["x"]
+
+
+def test_copy_on_write_merged_view():
+    a = {"a": {"b": 1}}
+    b = {"a": {"c": 2}}
+
+    cow = CopyOnWriteDict(MergedView(a, b))
+    cow["a"]["c"] = 3
+    assert cow.to_dict() == {"a": {"b": 1, "c": 3}}
+    assert b == {"a": {"c": 2}}
+
+
+def test_merge_dicts():
+    layers = (
+        {"a": {"b": 1, "l": [1]}, "c": 1, "x": {"y": 1}},
+        {"a": {"c": 2}, "c": {"d": 2}, "x": 5},
+        {"a": {"b": 3}, "c": {"e": 3}, "x": {"z": 3}},
+    )
+
+    res = merge_dicts(*layers)
+    assert res == merge_dict(merge_dict(layers[0], layers[1]), layers[2])
+    assert res == {
+        "a": {"b": 3, "c": 2, "l": [1]},
+        "c": {"d": 2, "e": 3},
+        "x": {"z": 3},
+    }
+
+    res["a"]["l"].append(2)
+    assert layers[0]["a"]["l"] == [1]
+
+
+def test_merge_dicts_no_copy():
+    a = {"a": {"b": [1]}, "c": {"d": 1}}
+    b = {"a": {"c": [2]}}
+
+    res = merge_dicts(a, b, copy=False)
+    assert res["a"]["b"] is a["a"]["b"]
+    assert res["c"] is a["c"]
+
+
+def test_merge_dicts_strategies():
+    layers = (
+        {"a": {"l": [1], "s": {1}, "n": 1, "r": [1]}, "t": [1]},
+        {"a": {"l": [2], "s": [2, 1], "n": 2}},
+        {"a": {"l": [3], "n": 3, "r": [2]}, "t": [2]},
+    )
+
+    res = merge_dicts(
+        *layers,
+        strategies={
+            ("a", "l"): "append",
+            ("a", "s"): "union",
+            ("a", "n"): lambda a, b: a + b,
+            ("a", "r"): "replace",
+        },
+    )
+    assert res == {
+        "a": {"l": [1, 2, 3], "s": {1, 2}, "n": 6, "r": [2]},
+        "t": [2],
+    }
+
+
+@pytest.mark.parametrize(
+    "strategy, expected",
+    [
+        ("replace", [1, 2, 2]),
+        ("append", [1, 2, 2]),
+        ("union", {1, 2}),
+        (lambda a, b: a + b, [1, 2, 2]),
+    ],
+)
+def test_merge_dicts_strategies_one_layer(strategy, expected):
+    layer = {"t": [1, 2, 2]}
+    res = merge_dicts(layer, {"x": 1}, strategies={("t",): strategy}, copy=False)
+    assert res == {"t": expected, "x": 1}
+    assert type(res["t"]) is type(expected)
+
+
+def test_merge_dicts_append_one_layer_copies():
+    layer = {"t": [1, 2]}
+    res = merge_dicts(layer, strategies={("t",): "append"}, copy=False)
+    assert res["t"] == [1, 2]
+    assert res["t"] is not layer["t"]
+
+
+def test_merge_dicts_empty():
+    assert merge_dicts() == {}
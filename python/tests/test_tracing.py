@@ -0,0 +1,92 @@
+import asyncio
+import io
+
+import pytest
+from oes.util.tracing import (
+    JSONLinesSink,
+    RingBufferSink,
+    current_span,
+    read_spans,
+    set_sink,
+    span,
+    traced,
+)
+
+
+@pytest.fixture
+def sink():
+    sink = RingBufferSink()
+    set_sink(sink)
+    yield sink
+    set_sink(None)
+
+
+def test_span(sink):
+    with span("parent", a=1) as parent:
+        assert current_span() is parent
+        with span("child") as child:
+            child.set_attribute("b", 2)
+            assert current_span() is child
+        assert current_span() is parent
+    assert current_span() is None
+
+    assert list(sink.spans) == [child, parent]
+    assert child.trace_id == parent.trace_id
+    assert child.parent_id == parent.span_id
+    assert parent.parent_id is None
+    assert parent.attributes == {"a": 1}
+    assert child.attributes == {"b": 2}
+    assert 0 <= child.duration <= parent.duration
+    assert sink.get_trace(parent.trace_id) == [parent, child]
+
+
+def test_span_error(sink):
+    with pytest.raises(ValueError), span("error"):
+        raise ValueError
+
+    assert sink.spans[0].error == "ValueError"
+
+
+def test_span_no_sink():
+    with span("test") as s:
+        assert s is None
+        assert current_span() is None
+
+
+def test_traced(sink):
+    @traced()
+    def func():
+        return current_span().name
+
+    @traced("async", a=1)
+    async def async_func():
+        with span("child"):
+            await asyncio.sleep(0)
+        return func()
+
+    assert asyncio.run(async_func()) == "test_traced.<locals>.func"
+    assert [s.name for s in sink.spans] == [
+        "child",
+        "test_traced.<locals>.func",
+        "async",
+    ]
+    assert sink.spans[2].attributes == {"a": 1}
+    assert len({s.trace_id for s in sink.spans}) == 1
+
+
+def test_json_lines_sink():
+    stream = io.StringIO()
+    set_sink(JSONLinesSink(stream))
+    try:
+        with span("parent", a=object()) as parent, span("child"):
+            pass
+    finally:
+        set_sink(None)
+
+    stream.seek(0)
+    child_dict, parent_dict = read_spans(stream)
+    assert parent_dict == parent.to_dict() | {
+        "attributes": {"a": str(parent.attributes["a"])}
+    }
+    assert child_dict["parent_id"] == parent.span_id
+    assert child_dict["name"] == "child"
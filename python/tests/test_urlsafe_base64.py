@@ -1,4 +1,19 @@
-from oes.util.urlsafe_base64 import urlsafe_b64decode, urlsafe_b64encode
+import base64
+import binascii
+import os
+
+import pytest
+from oes.util.urlsafe_base64 import (
+    urlsafe_b64decode,
+    urlsafe_b64decode_bytes,
+    urlsafe_b64decode_into,
+    urlsafe_b64decode_many,
+    urlsafe_b64encode,
+    urlsafe_b64encode_bytes,
+    urlsafe_b64encode_many,
+)
+
+_values = [os.urandom(n) for n in range(20)] + [b"\xfb\xff\xfe" * 10]
 
 
 def test_urlsafe_base64_encode():
@@ -7,3 +22,49 @@ def test_urlsafe_base64_encode():
 
 def test_urlsafe_base64_decode():
     assert urlsafe_b64decode("ZXhhbXBsZQ") == b"example"
+
+
+@pytest.mark.parametrize("value", _values)
+def test_urlsafe_base64_round_trip(value):
+    expected = base64.urlsafe_b64encode(value).rstrip(b"=")
+    assert urlsafe_b64encode_bytes(value) == expected
+    assert urlsafe_b64encode(value) == expected.decode()
+    assert urlsafe_b64decode_bytes(expected) == value
+    assert urlsafe_b64decode_bytes(base64.urlsafe_b64encode(value)) == value
+    assert urlsafe_b64decode(expected.decode()) == value
+
+
+def test_urlsafe_base64_decode_invalid():
+    with pytest.raises(binascii.Error):
+        urlsafe_b64decode("ZXhhb")
+
+    with pytest.raises(ValueError):
+        urlsafe_b64decode("ZXhhbXBsZQé")
+
+
+def test_urlsafe_base64_decode_into():
+    buffer = bytearray(10)
+    assert urlsafe_b64decode_into("ZXhhbXBsZQ", buffer) == 7
+    assert buffer == b"example\x00\x00\x00"
+
+    view = memoryview(buffer)[3:]
+    assert urlsafe_b64decode_into(b"ZXhhbXBsZQ", view) == 7
+    assert buffer == b"exaexample"
+
+    with pytest.raises(ValueError):
+        urlsafe_b64decode_into("ZXhhbXBsZQ", bytearray(6))
+
+
+def test_urlsafe_base64_decode_into_chunks():
+    value = bytes(range(256)) * 400
+    encoded = base64.urlsafe_b64encode(value)
+    assert encoded.endswith(b"==")
+    buffer = bytearray(len(value))
+    assert urlsafe_b64decode_into(encoded, buffer) == len(value)
+    assert buffer == value
+
+
+def test_urlsafe_base64_many():
+    encoded = urlsafe_b64encode_many(_values)
+    assert encoded == [urlsafe_b64encode(v) for v in _values]
+    assert urlsafe_b64decode_many(encoded) == _values